@@ -113,6 +113,30 @@ export class TemplateResolver {
     return { content: null, ref: null };
   }
 
+  /**
+   * Library content for the host scripts that scan every container config:
+   * lxc_config_parser_lib.py followed by lxc_conf_scan_lib.py.
+   * @throws Error if either library is missing
+   */
+  resolveConfScanLibraryContent(): string {
+    // The parser library starts with "from __future__", so it goes first
+    return ["lxc_config_parser_lib.py", "lxc_conf_scan_lib.py"]
+      .map((libraryName) => {
+        const content = this.repositories.getScript({
+          name: libraryName,
+          scope: "shared",
+          category: "library",
+        });
+        if (!content) {
+          throw new Error(
+            `${libraryName} not found (expected in local/shared/scripts/library or json/shared/scripts/library)`,
+          );
+        }
+        return content;
+      })
+      .join("\n\n");
+  }
+
   resolveLibraryPath(ref: ScriptRef | null): string | null {
     if (!ref) return null;
     return this.repositories.resolveLibraryPath(ref);
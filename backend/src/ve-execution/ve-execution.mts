@@ -23,6 +23,7 @@ import { VeExecutionHostDiscovery } from "./ve-execution-host-discovery.mjs";
 import { VeExecutionCommandProcessor } from "./ve-execution-command-processor.mjs";
 import { VeExecutionStateManager } from "./ve-execution-state-manager.mjs";
 import { PersistenceManager } from "../persistence/persistence-manager.mjs";
+import { TemplateResolver } from "../templates/template-resolver.mjs";
 
 // Re-export for backward compatibility
 export type { IOutput, IProxmoxRunResult, IRestartInfo };
@@ -238,13 +239,9 @@ export class VeExecution extends EventEmitter {
       throw new Error("find-containers-by-app-id.py not found");
     }
 
-    const libraryContent = repositories.getScript({
-      name: "lxc_config_parser_lib.py",
-      scope: "shared",
-    });
-    if (!libraryContent) {
-      throw new Error("lxc_config_parser_lib.py not found");
-    }
+    const libraryContent = new TemplateResolver(
+      repositories,
+    ).resolveConfScanLibraryContent();
 
     // Replace template variable in script
     const scriptWithAppId = scriptContent.replace(
@@ -2,6 +2,7 @@ import express from "express";
 import { ApiUri, IInstallationsResponse, ICommand } from "@src/types.mjs";
 import { ContextManager } from "../context-manager.mjs";
 import { PersistenceManager } from "../persistence/persistence-manager.mjs";
+import { TemplateResolver } from "../templates/template-resolver.mjs";
 import { VeExecution } from "../ve-execution/ve-execution.mjs";
 import { determineExecutionMode } from "../ve-execution/ve-execution-constants.mjs";
 import { sendErrorResponse } from "./webapp-error-utils.mjs";
@@ -37,18 +38,9 @@ export function registerInstallationsRoutes(
         return;
       }
 
-      const libraryContent = repositories.getScript({
-        name: "lxc_config_parser_lib.py",
-        scope: "shared",
-        category: "library", // library scripts are in library/ category
-      });
-      if (!libraryContent) {
-        res.status(500).json({
-          error:
-            "lxc_config_parser_lib.py not found (expected in local/shared/scripts/library or json/shared/scripts/library)",
-        });
-        return;
-      }
+      const libraryContent = new TemplateResolver(
+        repositories,
+      ).resolveConfScanLibraryContent();
 
       const cmd: ICommand = {
         name: "List Managed OCI Containers",
@@ -0,0 +1,140 @@
+import { spawnSync, type SpawnSyncReturns } from "node:child_process";
+import fs from "node:fs";
+import path from "node:path";
+import {
+  createTestEnvironment,
+  type TestEnvironment,
+} from "./test-environment.mjs";
+import { TestPersistenceHelper, Volume } from "./test-persistence-helper.mjs";
+
+/** Libraries prepended to the config scanning scripts, in this order */
+const CONF_SCAN_LIBRARIES = [
+  "library/lxc_config_parser_lib.py",
+  "library/lxc_conf_scan_lib.py",
+];
+
+/** Fixed mtime of written configs, so cache keys only change when a test changes them */
+export const CONF_MTIME = 1700000000;
+
+export interface LxcConfScanTestSetup {
+  env: TestEnvironment;
+  persistenceHelper: TestPersistenceHelper;
+  /** Used as LXC_MANAGER_PVE_LXC_DIR */
+  lxcDir: string;
+  /** Not created; pass it as LXC_MANAGER_CONF_CACHE_DIR */
+  cacheDir: string;
+  /** Writes <vmId>.conf with CONF_MTIME */
+  writeConf: (vmId: number, content: string) => void;
+  /** Installs a fake pct whose `pct list` reports the given statuses */
+  writePct: (statuses: Record<number, string>) => void;
+  /** Runs Python code with the scan libraries prepended */
+  runPython: (
+    code: string,
+    extraEnv?: Record<string, string>,
+  ) => SpawnSyncReturns<string>;
+  /** Runs a shared script and returns its parsed "containers" output */
+  runContainersScript: <T>(
+    scriptContent: string,
+    extraEnv?: Record<string, string>,
+  ) => T[];
+  /** Reads a script below json/shared/scripts */
+  readScript: (name: string) => string;
+  cleanup: () => void;
+}
+
+/**
+ * Test environment for the host scripts that scan every container config.
+ * @param scripts Scripts below shared/scripts to copy besides the libraries
+ */
+export function createLxcConfScanTestSetup(
+  testFileUrl: string,
+  scripts: string[] = [],
+): LxcConfScanTestSetup {
+  const env = createTestEnvironment(testFileUrl, {
+    jsonIncludePatterns: [...CONF_SCAN_LIBRARIES, ...scripts].map(
+      (name) => `^shared/scripts/${name.replace(/[.]/g, "\\.")}$`,
+    ),
+  });
+  env.initPersistence({ enableCache: false });
+  const persistenceHelper = new TestPersistenceHelper({
+    repoRoot: env.repoRoot,
+    localRoot: env.localDir,
+    jsonRoot: env.jsonDir,
+    schemasRoot: env.schemaDir,
+  });
+  persistenceHelper.ensureDirSync(Volume.LocalRoot, "lxc");
+  persistenceHelper.ensureDirSync(Volume.LocalRoot, "bin");
+  const lxcDir = persistenceHelper.resolve(Volume.LocalRoot, "lxc");
+  const binDir = persistenceHelper.resolve(Volume.LocalRoot, "bin");
+  const cacheDir = persistenceHelper.resolve(Volume.LocalRoot, "conf-cache");
+
+  const readScript = (name: string) =>
+    persistenceHelper.readTextSync(Volume.JsonSharedScripts, name);
+  const libraryContent = CONF_SCAN_LIBRARIES.map(readScript).join("\n\n");
+
+  const writeConf = (vmId: number, content: string) => {
+    const confPath = path.join(lxcDir, `${vmId}.conf`);
+    fs.writeFileSync(confPath, content);
+    fs.utimesSync(confPath, CONF_MTIME, CONF_MTIME);
+  };
+
+  const writePct = (statuses: Record<number, string>) => {
+    const pctPath = path.join(binDir, "pct");
+    fs.writeFileSync(
+      pctPath,
+      [
+        "#!/bin/sh",
+        'if [ "$1" = "list" ]; then',
+        '  echo "VMID       Status     Lock         Name"',
+        ...Object.entries(statuses).map(
+          ([vmId, status]) =>
+            `  echo "${vmId}        ${status}                 ct-${vmId}"`,
+        ),
+        "fi",
+      ].join("\n") + "\n",
+    );
+    fs.chmodSync(pctPath, 0o755);
+  };
+
+  const runPython = (code: string, extraEnv: Record<string, string> = {}) =>
+    spawnSync("python3", [], {
+      input: `${libraryContent}\n\n${code}\n`,
+      env: {
+        ...process.env,
+        PATH: `${binDir}${path.delimiter}${process.env.PATH}`,
+        LXC_MANAGER_PVE_LXC_DIR: lxcDir,
+        ...extraEnv,
+      },
+      encoding: "utf-8",
+      timeout: 5000,
+    });
+
+  const runContainersScript = <T>(
+    scriptContent: string,
+    extraEnv: Record<string, string> = {},
+  ): T[] => {
+    const result = runPython(scriptContent, extraEnv);
+    if (result.status !== 0) {
+      throw new Error(`Script failed (${result.status}): ${result.stderr}`);
+    }
+    const outputs: { id: string; value: string }[] = JSON.parse(result.stdout);
+    const containers = outputs.find((output) => output.id === "containers");
+    if (!containers) {
+      throw new Error(`No containers output: ${result.stdout}`);
+    }
+    return JSON.parse(containers.value);
+  };
+
+  return {
+    env,
+    persistenceHelper,
+    lxcDir,
+    cacheDir,
+    writeConf,
+    writePct,
+    runPython,
+    runContainersScript,
+    readScript,
+    cleanup: () => env.cleanup(),
+  };
+}
@@ -30,6 +30,7 @@ describe("WebApp Installations API", () => {
       jsonIncludePatterns: [
         ".*list/list-managed-oci-containers.*",
         ".*library/lxc_config_parser_lib.*",
+        ".*library/lxc_conf_scan_lib.*",
       ],
       // Schemas are read from repo directly by default (no copying)
     });
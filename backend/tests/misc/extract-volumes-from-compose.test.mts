@@ -0,0 +1,128 @@
+import { describe, it, expect, beforeEach, afterEach } from "vitest";
+import { spawnSync } from "child_process";
+import {
+  createTestEnvironment,
+  TestEnvironment,
+} from "@tests/helper/test-environment.mjs";
+import {
+  TestPersistenceHelper,
+  Volume,
+} from "@tests/helper/test-persistence-helper.mjs";
+
+// The script needs PyYAML (python3-yaml on PVE hosts)
+const hasPyYaml =
+  spawnSync("python3", ["-c", "import yaml"], { encoding: "utf-8" }).status ===
+  0;
+
+describe.skipIf(!hasPyYaml)("host-extract-volumes-from-compose.py", () => {
+  let env: TestEnvironment;
+  let persistenceHelper: TestPersistenceHelper;
+
+  beforeEach(() => {
+    env = createTestEnvironment(import.meta.url, {
+      jsonIncludePatterns: [
+        "^shared/scripts/post_start/host-extract-volumes-from-compose\\.py$",
+      ],
+      fixturesIncludePatterns: ["^compose/.*\\.yaml$"],
+    });
+    env.initPersistence({ enableCache: false });
+    persistenceHelper = new TestPersistenceHelper({
+      repoRoot: env.repoRoot,
+      localRoot: env.localDir,
+      jsonRoot: env.jsonDir,
+      schemasRoot: env.schemaDir,
+    });
+  });
+
+  afterEach(() => {
+    env.cleanup();
+  });
+
+  function runScript(
+    fixture: string,
+    composeProject: string,
+    hostname: string,
+  ): { outputs: Record<string, string>; stderr: string } {
+    const compose = persistenceHelper.readTextSync(
+      Volume.JsonRoot,
+      `compose/${fixture}`,
+    );
+    const scriptContent = persistenceHelper
+      .readTextSync(
+        Volume.JsonSharedScripts,
+        "post_start/host-extract-volumes-from-compose.py",
+      )
+      .replace(
+        /\{\{\s*compose_file\s*\}\}/g,
+        Buffer.from(compose).toString("base64"),
+      )
+      .replace(/\{\{\s*compose_project\s*\}\}/g, composeProject)
+      .replace(/\{\{\s*hostname\s*\}\}/g, hostname);
+
+    const result = spawnSync("python3", [], {
+      input: scriptContent,
+      encoding: "utf-8",
+      timeout: 5000,
+    });
+    expect(result.status).toBe(0);
+
+    const outputs: Record<string, string> = {};
+    for (const output of JSON.parse(result.stdout)) {
+      outputs[output.id] = output.value;
+    }
+    return { outputs, stderr: result.stderr || "" };
+  }
+
+  it("maps short syntax volumes", () => {
+    const { outputs, stderr } = runScript(
+      "volumes-short-syntax.yaml",
+      "NOT_DEFINED",
+      "NOT_DEFINED",
+    );
+
+    expect(outputs.volumes).toBe(
+      [
+        "data=usr/share/nginx/html",
+        "config_nginx=etc/nginx/conf.d",
+        "logs=var/log/nginx",
+        "certs=etc/ssl/certs",
+      ].join("\n"),
+    );
+    // Top-level name is used when no project or hostname is set
+    expect(outputs.compose_project).toBe("shortapp");
+    expect(outputs.uid).toBe("1000");
+    expect(outputs.gid).toBe("1000");
+    expect(stderr).toContain("Invalid volume specification 'scratch'");
+  });
+
+  it("maps long syntax volumes mixed with short syntax", () => {
+    const { outputs, stderr } = runScript(
+      "volumes-long-syntax.yaml",
+      "NOT_DEFINED",
+      "pg-host",
+    );
+
+    expect(outputs.volumes).toBe(
+      [
+        "pgdata=var/lib/postgresql/data",
+        "backups=backups",
+        "localtime=etc/localtime",
+        "init=docker-entrypoint-initdb.d",
+      ].join("\n"),
+    );
+    expect(outputs.compose_project).toBe("pg-host");
+    expect(outputs.uid).toBe("999");
+    expect(stderr).toContain("Invalid volume specification");
+  });
+
+  it("does not output compose_project when it is already set", () => {
+    const { outputs } = runScript(
+      "volumes-long-syntax.yaml",
+      "mystack",
+      "pg-host",
+    );
+
+    expect(outputs.compose_project).toBeUndefined();
+    expect(outputs.volumes).toContain("pgdata=var/lib/postgresql/data");
+  });
+});
@@ -0,0 +1,112 @@
+import { describe, it, expect, beforeEach, afterEach } from "vitest";
+import fs from "node:fs";
+import path from "node:path";
+import {
+  createLxcConfScanTestSetup,
+  LxcConfScanTestSetup,
+} from "@tests/helper/lxc-conf-scan-test-helper.mjs";
+
+describe("find-containers-by-app-id.py", () => {
+  let setup: LxcConfScanTestSetup;
+
+  function managedConf(vmId: number, appId: string): string {
+    return (
+      [
+        `hostname: app-${vmId}`,
+        `description: <!-- oci-lxc-deployer:managed -->\\n<!-- oci-lxc-deployer:application-id ${appId} -->`,
+      ].join("\n") + "\n"
+    );
+  }
+
+  function runScript(
+    appId: string,
+    confCacheDir?: string,
+  ): { vm_id: number; hostname?: string }[] {
+    const scriptContent = setup
+      .readScript("find-containers-by-app-id.py")
+      .replace(/\{\{\s*application_id\s*\}\}/g, appId);
+    return setup.runContainersScript(
+      scriptContent,
+      confCacheDir ? { LXC_MANAGER_CONF_CACHE_DIR: confCacheDir } : {},
+    );
+  }
+
+  beforeEach(() => {
+    setup = createLxcConfScanTestSetup(import.meta.url, [
+      "find-containers-by-app-id.py",
+    ]);
+    setup.writePct({ 101: "running", 102: "running", 103: "running" });
+  });
+
+  afterEach(() => {
+    setup.cleanup();
+  });
+
+  it("finds containers whose marker is not lower case", () => {
+    setup.writeConf(
+      101,
+      [
+        "hostname: app-101",
+        "description: <!-- OCI-LXC-DEPLOYER:managed -->\\n<!-- Oci-Lxc-Deployer:application-id nginx -->",
+      ].join("\n") + "\n",
+    );
+    setup.writeConf(
+      102,
+      [
+        "hostname: app-102",
+        "description: %3C!-- OCI-LXC-Deployer%3Amanaged --%3E%0A%3C!-- OCI-LXC-Deployer%3Aapplication-id nginx --%3E",
+      ].join("\n") + "\n",
+    );
+
+    const containers = runScript("nginx");
+    expect(containers.map((c) => c.vm_id)).toEqual([101, 102]);
+    expect(containers.map((c) => c.hostname)).toEqual(["app-101", "app-102"]);
+  });
+
+  it("finds managed configs down to the size threshold", () => {
+    // The shortest possible match: the marker is the application id value
+    const threshold = "Application ID:oci-lxc-deployer:managed";
+    expect(threshold).toHaveLength(39);
+    setup.writeConf(101, threshold);
+    // Smaller than the 48 bytes the size check used to require
+    const small = "#OCI-LXC-DEPLOYER:managed\n#Application ID: a\n";
+    expect(small).toHaveLength(45);
+    setup.writeConf(102, small);
+
+    expect(runScript("oci-lxc-deployer:managed").map((c) => c.vm_id)).toEqual([
+      101,
+    ]);
+    expect(runScript("a").map((c) => c.vm_id)).toEqual([102]);
+  });
+
+  it("answers unchanged configs from the cache for any application id", () => {
+    const { cacheDir } = setup;
+    setup.writeConf(101, managedConf(101, "nginx"));
+    setup.writeConf(102, managedConf(102, "other"));
+    setup.writeConf(103, "hostname: plain-103\nmemory: 512\nswap: 512\n");
+    expect(runScript("nginx", cacheDir).map((c) => c.vm_id)).toEqual([101]);
+
+    // The prefilter rejects 102 and 103; only 103 is unmanaged for every
+    // application id. Rewrite every entry, so a cache hit shows up.
+    const entries = fs.readdirSync(cacheDir);
+    expect(entries).toHaveLength(2);
+    for (const name of entries) {
+      fs.writeFileSync(
+        path.join(cacheDir, name),
+        JSON.stringify({
+          is_managed: true,
+          application_id: "other",
+          hostname: "cached",
+        }),
+      );
+    }
+
+    const containers = runScript("other", cacheDir);
+    expect(containers.map((c) => c.vm_id)).toEqual([101, 102, 103]);
+    expect(containers.map((c) => c.hostname)).toEqual([
+      "cached",
+      "app-102",
+      "cached",
+    ]);
+  });
+});
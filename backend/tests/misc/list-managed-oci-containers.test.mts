@@ -0,0 +1,63 @@
+import { describe, it, expect, beforeEach, afterEach } from "vitest";
+import fs from "node:fs";
+import path from "node:path";
+import {
+  createLxcConfScanTestSetup,
+  LxcConfScanTestSetup,
+} from "@tests/helper/lxc-conf-scan-test-helper.mjs";
+
+describe("list-managed-oci-containers.py", () => {
+  let setup: LxcConfScanTestSetup;
+
+  function writeConf(vmId: number, image: string): void {
+    setup.writeConf(
+      vmId,
+      [
+        `hostname: app-${vmId}`,
+        `description: <!-- oci-lxc-deployer:managed -->\\n<!-- oci-lxc-deployer:oci-image ${image} -->`,
+      ].join("\n") + "\n",
+    );
+  }
+
+  function runScript(): { vm_id: number; hostname: string; status?: string }[] {
+    return setup.runContainersScript(
+      setup.readScript("list/list-managed-oci-containers.py"),
+      { LXC_MANAGER_CONF_CACHE_DIR: setup.cacheDir },
+    );
+  }
+
+  beforeEach(() => {
+    setup = createLxcConfScanTestSetup(import.meta.url, [
+      "list/list-managed-oci-containers.py",
+    ]);
+  });
+
+  afterEach(() => {
+    setup.cleanup();
+  });
+
+  it("answers unchanged configs from the cache but looks up statuses fresh", () => {
+    writeConf(101, "docker://alpine:3.19");
+    writeConf(102, "docker://debian:bookworm");
+    setup.writePct({ 101: "running", 102: "running" });
+    expect(runScript().map((c) => c.status)).toEqual(["running", "running"]);
+
+    // Rename every cached entry, so a cache hit shows up in the output.
+    // The script keeps its entries in a subdirectory of the cache dir.
+    const cacheDir = path.join(setup.cacheDir, "list-managed");
+    const entries = fs.readdirSync(cacheDir);
+    expect(entries).toHaveLength(2);
+    for (const name of entries) {
+      const filePath = path.join(cacheDir, name);
+      const cached = JSON.parse(fs.readFileSync(filePath, "utf-8"));
+      cached.item.hostname = "cached";
+      fs.writeFileSync(filePath, JSON.stringify(cached));
+    }
+
+    setup.writePct({ 101: "running", 102: "stopped" });
+    const containers = runScript();
+    expect(containers.map((c) => c.vm_id)).toEqual([101, 102]);
+    expect(containers.map((c) => c.hostname)).toEqual(["cached", "cached"]);
+    expect(containers.map((c) => c.status)).toEqual(["running", "stopped"]);
+  });
+});
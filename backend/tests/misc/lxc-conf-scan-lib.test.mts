@@ -0,0 +1,141 @@
+import { describe, it, expect, beforeEach, afterEach } from "vitest";
+import fs from "node:fs";
+import path from "node:path";
+import {
+  CONF_MTIME,
+  createLxcConfScanTestSetup,
+  LxcConfScanTestSetup,
+} from "@tests/helper/lxc-conf-scan-test-helper.mjs";
+import { Volume } from "@tests/helper/test-persistence-helper.mjs";
+
+describe("lxc_conf_scan_lib.py config cache", () => {
+  let setup: LxcConfScanTestSetup;
+  let lxcDir: string;
+  let cacheDir: string;
+
+  function cacheFiles(): string[] {
+    return fs.readdirSync(cacheDir).sort();
+  }
+
+  // Runs a snippet after the prepended libraries and returns its JSON output.
+  // keys() maps each config file name in lxcDir to its cache key.
+  function runLib(code: string, confCacheDir: string = cacheDir): any {
+    const prelude = [
+      "import json",
+      "import os",
+      'lxc_dir = os.environ["LXC_MANAGER_PVE_LXC_DIR"]',
+      'cache_dir = os.environ["CACHE_DIR"]',
+      "def keys():",
+      "    with os.scandir(lxc_dir) as it:",
+      "        return {e.name: conf_cache_key(e) for e in it}",
+    ].join("\n");
+
+    const result = setup.runPython(`${prelude}\n${code}`, {
+      CACHE_DIR: confCacheDir,
+    });
+    expect(result.stderr).toBe("");
+    expect(result.status).toBe(0);
+    return JSON.parse(result.stdout);
+  }
+
+  beforeEach(() => {
+    setup = createLxcConfScanTestSetup(import.meta.url);
+    ({ lxcDir, cacheDir } = setup);
+
+    setup.writeConf(101, "hostname: app-101\n");
+    setup.writeConf(102, "hostname: app-102\n");
+  });
+
+  afterEach(() => {
+    setup.cleanup();
+  });
+
+  it("stores one entry per key and loads it back", () => {
+    const [loaded, missing, key] = runLib(
+      [
+        'key = keys()["101.conf"]',
+        'conf_cache_put(cache_dir, key, {"is_managed": True})',
+        'fields = {"is_managed": bool}',
+        "loaded = conf_cache_get(cache_dir, key, fields)",
+        'missing = conf_cache_get(cache_dir, keys()["102.conf"], fields)',
+        "print(json.dumps([loaded, missing, key]))",
+      ].join("\n"),
+    );
+    expect(loaded).toEqual({ is_managed: true });
+    expect(missing).toBeNull();
+    expect(cacheFiles()).toEqual([`${key}.json`]);
+  });
+
+  it("changes the key when the mtime or the size changes", () => {
+    const printKey = 'print(json.dumps(keys()["101.conf"]))';
+    const original = runLib(printKey);
+    expect(runLib(printKey)).toBe(original);
+
+    const confPath = path.join(lxcDir, "101.conf");
+    fs.utimesSync(confPath, CONF_MTIME + 60, CONF_MTIME + 60);
+    const touched = runLib(printKey);
+    expect(touched).not.toBe(original);
+
+    // Same mtime, different size
+    setup.writeConf(101, "hostname: app-101\nmemory: 512\n");
+    const resized = runLib(printKey);
+    expect(resized).not.toBe(original);
+    expect(resized).not.toBe(touched);
+  });
+
+  it("does not key configs modified within the last two seconds", () => {
+    // Whole-second mtimes (pmxcfs) could repeat for a same-size edit
+    fs.writeFileSync(path.join(lxcDir, "103.conf"), "hostname: app-103\n");
+    const keys = runLib("print(json.dumps(keys()))");
+    expect(keys["103.conf"]).toBeNull();
+    expect(keys["101.conf"]).toMatch(/^[0-9a-f]{32}$/);
+  });
+
+  it("treats entries of the wrong shape as a miss", () => {
+    const loaded = runLib(
+      [
+        'key = keys()["101.conf"]',
+        'fields = {"is_managed": bool, "hostname": (str, type(None))}',
+        "results = []",
+        'for info in ([1, 2], {"hostname": "x"}, {"is_managed": "yes"}, {"is_managed": True}):',
+        "    conf_cache_put(cache_dir, key, info)",
+        "    results.append(conf_cache_get(cache_dir, key, fields))",
+        "print(json.dumps(results))",
+      ].join("\n"),
+    );
+    expect(loaded).toEqual([null, null, null, { is_managed: true }]);
+  });
+
+  it("prunes the entries of configs that are not live", () => {
+    const live = runLib(
+      [
+        "for key in keys().values():",
+        '    conf_cache_put(cache_dir, key, {"is_managed": False})',
+        'live = [keys()["101.conf"]]',
+        "conf_cache_prune(cache_dir, live)",
+        "print(json.dumps(live))",
+      ].join("\n"),
+    );
+    expect(cacheFiles()).toEqual([`${live[0]}.json`]);
+  });
+
+  it("ignores a cache dir that cannot be written", () => {
+    // A regular file in the path makes every cache write fail
+    const blocker = setup.persistenceHelper.resolve(
+      Volume.LocalRoot,
+      "not-a-dir",
+    );
+    fs.writeFileSync(blocker, "");
+
+    const loaded = runLib(
+      [
+        'key = keys()["101.conf"]',
+        'conf_cache_put(cache_dir, key, {"is_managed": True})',
+        "conf_cache_prune(cache_dir, [key])",
+        'print(json.dumps(conf_cache_get(cache_dir, key, {"is_managed": bool})))',
+      ].join("\n"),
+      path.join(blocker, "conf-cache"),
+    );
+    expect(loaded).toBeNull();
+  });
+});
@@ -5,103 +5,174 @@ Scans `${LXC_MANAGER_PVE_LXC_DIR:-/etc/pve/lxc}/*.conf` for containers that:
 - contain the oci-lxc-deployer managed marker
 - match the specified application_id
 
-Only checks status for matching containers (not all), then returns only running ones.
+Looks up the status of matching containers via a single `pct list` call,
+then returns only running ones.
 
-Requires lxc_config_parser_lib.py to be prepended via library parameter.
+Requires lxc_config_parser_lib.py and lxc_conf_scan_lib.py to be prepended
+(in that order) as the library.
 
 Template variables:
   - application_id: The application ID to search for (required)
 
+Environment:
+  - LXC_MANAGER_CONF_CACHE_DIR: Optional directory for caching per-config
+    parse results keyed by (path, mtime, size) across invocations. Opt-in:
+    the backend does not set it. Only results that hold for every
+    application id are stored: parsed candidates and configs without the
+    marker. Configs modified within the last two seconds are not cached,
+    since pmxcfs mtimes only have whole seconds.
+
 Output:
   - containers: JSON array of running containers with vm_id and application_id
 """
 
 import json
 import os
-import subprocess
+import re
 from concurrent.futures import ThreadPoolExecutor
-from pathlib import Path
+from urllib.parse import unquote_to_bytes
 
 # Library functions are prepended - these are available:
 # - parse_lxc_config(conf_text) -> LxcConfig
 # - is_managed_container(conf_text) -> bool
+# - get_statuses() -> dict[int, str] (lxc_conf_scan_lib.py)
+# - conf_cache_key/get/put/prune for LXC_MANAGER_CONF_CACHE_DIR (lxc_conf_scan_lib.py)
+
+# Field types of a cached result (see conf_cache_get)
+_CACHED_INFO_FIELDS = {
+    "is_managed": bool,
+    "application_id": (str, type(None)),
+    "hostname": (str, type(None)),
+}
+
+# Present in every marker, whether the description is URL-encoded or not.
+# Case-insensitive like MANAGED_RE, which confirms the candidates.
+_deployer_marker_search = re.compile(rb"oci-lxc-deployer", re.IGNORECASE).search
+
+# A match holds the managed marker and an application id line. The shortest
+# is "Application ID:oci-lxc-deployer:managed", with the marker as the value.
+_MIN_MANAGED_CONF_SIZE = len("oci-lxc-deployer:managed") + len("Application ID:")
+
 
+def _may_contain_app_id(buf: bytes, raw_app_id: bytes) -> bool:
+    """Cheap prefilter: a config can only match if it contains the app id.
 
-def get_status(vmid: int) -> str | None:
-    """Get container status via pct status."""
+    The notes may be Proxmox-encoded, so configs with a '%' are also checked
+    after percent-decoding. Candidates are confirmed with parse_lxc_config.
+    """
+    if raw_app_id in buf:
+        return True
+    return b"%" in buf and raw_app_id in unquote_to_bytes(buf)
+
+
+def _safe_read(path: str) -> bytes | None:
+    """Read a config file as raw bytes, returning None if it cannot be read."""
     try:
-        result = subprocess.run(
-            ["pct", "status", str(vmid)],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if result.returncode != 0:
-            return None
-        out = result.stdout.strip()
-        # Expected format: "status: running" or "status: stopped"
-        if "status:" in out:
-            return out.split("status:", 1)[1].strip() or None
-        return out or None
+        with open(path, "rb") as f:
+            return f.read()
     except Exception:
         return None
 
 
+def _may_be_managed(entry: os.DirEntry) -> bool:
+    """Cheap size check - files too small to hold the markers are skipped unread."""
+    try:
+        return entry.stat(follow_symlinks=False).st_size >= _MIN_MANAGED_CONF_SIZE
+    except OSError:
+        return False
+
+
 def main() -> None:
     app_id = "{{ application_id }}"
     if not app_id or app_id == "NOT_DEFINED":
         print(json.dumps([{"id": "error", "value": "application_id parameter is required"}]))
         return
 
-    base_dir = Path(os.environ.get("LXC_MANAGER_PVE_LXC_DIR", "/etc/pve/lxc"))
+    base_dir = os.environ.get("LXC_MANAGER_PVE_LXC_DIR", "/etc/pve/lxc")
+
+    # Cheap substring checks per file skip the full parse for other applications
+    raw_app_id = app_id.encode()
 
     # Phase 1: Find all containers matching the application_id (no status check yet)
     matching: list[dict] = []
 
-    if base_dir.is_dir():
-        for conf_path in sorted(base_dir.glob("*.conf"), key=lambda p: p.name):
-            vmid_str = conf_path.stem
-            if not vmid_str.isdigit():
-                continue
+    if os.path.isdir(base_dir):
+        with os.scandir(base_dir) as it:
+            entries = [
+                e for e in it
+                if e.name.endswith(".conf") and e.name[:-5].isdigit() and _may_be_managed(e)
+            ]
+
+        # Cached results must hold for any application id (see the loop below)
+        cache_dir = os.environ.get("LXC_MANAGER_CONF_CACHE_DIR") or None
+        keys: dict[str, str] = {}
+        infos: dict[str, dict] = {}
+        if cache_dir:
+            for entry in entries:
+                key = conf_cache_key(entry)
+                if key is None:
+                    continue
+                keys[entry.path] = key
+                info = conf_cache_get(cache_dir, key, _CACHED_INFO_FIELDS)
+                if info is not None:
+                    infos[entry.path] = info
+
+        # /etc/pve/lxc is backed by pmxcfs (FUSE) - overlap the read round-trips
+        to_read = [e.path for e in entries if e.path not in infos]
+        if len(to_read) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(to_read))) as executor:
+                buffers = list(executor.map(_safe_read, to_read))
+        else:
+            buffers = [_safe_read(p) for p in to_read]
 
-            try:
-                conf_text = conf_path.read_text(encoding="utf-8", errors="replace")
-            except Exception:
+        for path, buf in zip(to_read, buffers):
+            if buf is None:
                 continue
 
-            # Quick check before full parsing
-            if not is_managed_container(conf_text):
+            # Quick check on raw bytes - only decode candidates
+            if not _may_contain_app_id(buf, raw_app_id):
+                # Without the marker the config is unmanaged for every app id;
+                # a rejected managed config is left for a run that asks for it
+                if path in keys and not _deployer_marker_search(buf):
+                    conf_cache_put(cache_dir, keys[path], {"is_managed": False})
                 continue
+            if not _deployer_marker_search(buf):
+                info = {"is_managed": False}
+            else:
+                # Full parse (also evaluates the managed marker)
+                config = parse_lxc_config(buf.decode("utf-8", errors="replace"), managed_only=True)
+                info = {
+                    "is_managed": config.is_managed,
+                    "application_id": config.application_id,
+                    "hostname": config.hostname,
+                }
+            infos[path] = info
+            if path in keys:
+                conf_cache_put(cache_dir, keys[path], info)
 
-            # Full parse to get application_id
-            config = parse_lxc_config(conf_text)
+        if cache_dir:
+            conf_cache_prune(cache_dir, keys.values())
 
-            if config.application_id == app_id:
+        for entry in entries:
+            info = infos.get(entry.path)
+            if info and info["is_managed"] and info.get("application_id") == app_id:
                 matching.append({
-                    "vm_id": int(vmid_str),
-                    "application_id": config.application_id,
-                    "hostname": config.hostname,
+                    "vm_id": int(entry.name[:-5]),
+                    "application_id": info["application_id"],
+                    "hostname": info.get("hostname"),
                 })
 
-    # Phase 2: Check status only for matching containers
+    # Phase 2: Check status with one `pct list` call (only if anything matched)
     running: list[dict] = []
 
     if matching:
-        if len(matching) == 1:
-            # Single container - no need for thread pool
-            status = get_status(matching[0]["vm_id"])
-            if status == "running":
-                matching[0]["status"] = status
-                running.append(matching[0])
-        else:
-            # Multiple containers - use thread pool
-            vmids = [item["vm_id"] for item in matching]
-            with ThreadPoolExecutor(max_workers=min(4, len(matching))) as executor:
-                statuses = list(executor.map(get_status, vmids))
-            for item, status in zip(matching, statuses):
-                if status == "running":
-                    item["status"] = status
-                    running.append(item)
+        statuses = get_statuses()
+        for item in matching:
+            if statuses.get(item["vm_id"]) == "running":
+                item["status"] = "running"
+                running.append(item)
+        # Stable order by vmid
+        running.sort(key=lambda item: item["vm_id"])
 
     # Return output in VeExecution format: IOutput[]
     print(json.dumps([{"id": "containers", "value": json.dumps(running)}]))
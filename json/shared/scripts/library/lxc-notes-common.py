@@ -3,122 +3,177 @@
 Shared functions for writing LXC container notes/description.
 Used by host-write-lxc-notes.py and host-write-docker-compose-notes.py.
 
+build_notes() assembles the complete notes for both scripts. The other
+build_* helpers write newline-terminated lines into a caller-provided
+io.StringIO buffer; notes_text() returns the assembled notes.
+
 This is a library - import and use the functions, do not execute directly.
 Libraries must NOT contain {{ }} template variables.
 """
 
+import io
 import subprocess
 import sys
 import json
 
 PVE_DESCRIPTION_LIMIT = 8192
 
+# Values the backend substitutes for unset template variables
+UNDEFINED_VALUES = frozenset(("NOT_DEFINED", ""))
+
 
 def not_defined(val):
     """Check if a template variable was not set (replaced with NOT_DEFINED or empty)."""
-    return val == "NOT_DEFINED" or val == ""
+    return val in UNDEFINED_VALUES
 
 
 def normalize_value(raw):
     """Return empty string if value is not defined, otherwise return as-is."""
-    return "" if not_defined(raw) else raw
+    return "" if raw in UNDEFINED_VALUES else raw
 
 
 def strip_oci_prefix(oci_image_raw):
     """Strip docker:// or oci:// prefix from OCI image string for display."""
-    for prefix in ["docker://", "oci://"]:
-        if oci_image_raw.startswith(prefix):
-            return oci_image_raw[len(prefix):]
+    if oci_image_raw.startswith(("docker://", "oci://")):
+        # Only the first "://" ends the prefix (e.g. "docker://oci://x" -> "oci://x")
+        return oci_image_raw.split("://", 1)[1]
     return oci_image_raw
 
 
-def build_hidden_markers(vmid, oci_image_visible="", app_id="", app_name="",
+def build_hidden_markers(out, vmid, oci_image_visible="", app_id="", app_name="",
                          version="", deployer_url="", ve_context="",
                          icon_base64="", icon_mime_type="",
                          username="", uid="", gid=""):
-    """Build hidden HTML comment markers for machine parsing."""
-    lines = []
-    lines.append("<!-- oci-lxc-deployer:managed -->")
+    """Write hidden HTML comment markers for machine parsing to out."""
+    out.write("<!-- oci-lxc-deployer:managed -->\n")
     if oci_image_visible:
-        lines.append("<!-- oci-lxc-deployer:oci-image %s -->" % oci_image_visible)
+        out.write(f"<!-- oci-lxc-deployer:oci-image {oci_image_visible} -->\n")
     if app_id:
-        lines.append("<!-- oci-lxc-deployer:application-id %s -->" % app_id)
+        out.write(f"<!-- oci-lxc-deployer:application-id {app_id} -->\n")
     if app_name:
-        lines.append("<!-- oci-lxc-deployer:application-name %s -->" % app_name)
+        out.write(f"<!-- oci-lxc-deployer:application-name {app_name} -->\n")
     if version:
-        lines.append("<!-- oci-lxc-deployer:version %s -->" % version)
+        out.write(f"<!-- oci-lxc-deployer:version {version} -->\n")
     if deployer_url and ve_context:
-        lines.append("<!-- oci-lxc-deployer:log-url %s/logs/%s/%s -->" % (deployer_url, vmid, ve_context))
+        out.write(f"<!-- oci-lxc-deployer:log-url {deployer_url}/logs/{vmid}/{ve_context} -->\n")
     if icon_base64 and icon_mime_type:
-        lines.append("<!-- oci-lxc-deployer:icon-url data:%s;base64,... -->" % icon_mime_type)
+        out.write(f"<!-- oci-lxc-deployer:icon-url data:{icon_mime_type};base64,... -->\n")
     if username:
-        lines.append("<!-- oci-lxc-deployer:username %s -->" % username)
+        out.write(f"<!-- oci-lxc-deployer:username {username} -->\n")
     if uid:
-        lines.append("<!-- oci-lxc-deployer:uid %s -->" % uid)
+        out.write(f"<!-- oci-lxc-deployer:uid {uid} -->\n")
     if gid:
-        lines.append("<!-- oci-lxc-deployer:gid %s -->" % gid)
-    return lines
+        out.write(f"<!-- oci-lxc-deployer:gid {gid} -->\n")
 
 
-def build_visible_header(app_id="", app_name="", deployer_url="",
-                         icon_base64="", icon_mime_type="", include_icon=True):
-    """Build visible Markdown header: title, icon, managed-by link."""
-    lines = []
-    header_name = app_name if app_name else app_id if app_id else "Container"
-    lines.append("# %s" % header_name)
-    lines.append("")
+def icon_block(app_id="", app_name="", icon_base64="", icon_mime_type=""):
+    """Return the visible inline icon block, or "" if there is no icon."""
+    if not (icon_base64 and icon_mime_type):
+        return ""
+    icon_alt = app_name if app_name else app_id
+    return f'<img src="data:{icon_mime_type};base64,{icon_base64}" width="16" height="16" alt="{icon_alt}"/>\n\n'
 
-    if include_icon and icon_base64 and icon_mime_type:
-        icon_alt = app_name if app_name else app_id
-        lines.append('<img src="data:%s;base64,%s" width="16" height="16" alt="%s"/>' % (icon_mime_type, icon_base64, icon_alt))
-        lines.append("")
+
+def build_visible_header(out, app_id="", app_name="", deployer_url="", icon=""):
+    """Write visible Markdown header to out: title, icon block, managed-by link."""
+    header_name = app_name if app_name else app_id if app_id else "Container"
+    out.write(f"# {header_name}\n\n")
+    out.write(icon)
 
     if deployer_url:
-        lines.append("Managed by [oci-lxc-deployer](%s/)." % deployer_url)
+        out.write(f"Managed by [oci-lxc-deployer]({deployer_url}/).\n")
     else:
-        lines.append("Managed by **oci-lxc-deployer**.")
-
-    return lines
+        out.write("Managed by **oci-lxc-deployer**.\n")
 
 
-def build_app_info(app_id="", app_name="", version=""):
-    """Build application ID and version lines."""
-    lines = []
+def build_app_info(out, app_id="", app_name="", version=""):
+    """Write application ID and version lines to out."""
     if app_id and app_id != app_name:
-        lines.append("")
-        lines.append("Application ID: %s" % app_id)
+        out.write(f"\nApplication ID: {app_id}\n")
     if version:
-        lines.append("")
-        lines.append("Version: %s" % version)
-    return lines
+        out.write(f"\nVersion: {version}\n")
 
 
-def build_links_section(vmid, deployer_url, ve_context, link_text="Logs"):
-    """Build the Links section with log viewer link."""
+def build_links_section(out, vmid, deployer_url, ve_context, link_text="Logs"):
+    """Write the Links section with log viewer link to out."""
     if not deployer_url or not ve_context:
-        return []
-    lines = []
-    lines.append("")
-    lines.append("## Links")
-    lines.append("- [%s](%s/logs/%s/%s)" % (link_text, deployer_url, vmid, ve_context))
-    return lines
+        return
+    out.write(f"\n## Links\n- [{link_text}]({deployer_url}/logs/{vmid}/{ve_context})\n")
+
+
+def build_notes(vmid, app_id="", app_name="", version="", deployer_url="",
+                ve_context="", icon_base64="", icon_mime_type="", username="",
+                uid="", gid="", oci_image_visible="", template_path="",
+                hostname="", link_text="Logs"):
+    """Build the complete notes; returns (notes, icon block) for write_notes.
+
+    oci_image_visible/template_path and hostname add the OCI image or LXC
+    template line and the log file line (standard apps only).
+    """
+    out = io.StringIO()
+    build_hidden_markers(
+        out, vmid, oci_image_visible=oci_image_visible, app_id=app_id,
+        app_name=app_name, version=version, deployer_url=deployer_url,
+        ve_context=ve_context, icon_base64=icon_base64,
+        icon_mime_type=icon_mime_type, username=username, uid=uid, gid=gid,
+    )
+
+    icon = icon_block(
+        app_id=app_id, app_name=app_name, icon_base64=icon_base64,
+        icon_mime_type=icon_mime_type,
+    )
+    build_visible_header(
+        out, app_id=app_id, app_name=app_name, deployer_url=deployer_url,
+        icon=icon,
+    )
+
+    build_app_info(out, app_id=app_id, app_name=app_name, version=version)
+
+    # OCI image or LXC template
+    if oci_image_visible:
+        out.write(f"\nOCI image: {oci_image_visible}\n")
+    elif template_path:
+        out.write(f"\nLXC template: {template_path}\n")
+
+    # Log file location
+    if hostname:
+        out.write(f"\nLog file: /var/log/lxc/{hostname}-{vmid}.log\n")
+
+    build_links_section(out, vmid, deployer_url, ve_context, link_text=link_text)
+
+    return notes_text(out), icon
+
+
+def notes_text(out):
+    """Return the notes written to out, without the trailing newline."""
+    return out.getvalue().removesuffix("\n")
+
 
+def write_notes(vmid, notes_content, icon=""):
+    """Write notes to LXC container via pct set, handling size limits and JSON output.
 
-def write_notes(vmid, notes_content_with_icon, notes_content_without_icon):
-    """Write notes to LXC container via pct set, handling size limits and JSON output."""
-    notes_content = notes_content_with_icon
+    Notes over PVE_DESCRIPTION_LIMIT are written without their icon block.
+    """
     if len(notes_content) > PVE_DESCRIPTION_LIMIT:
         print("Notes exceed %d chars (%d), omitting inline icon" % (PVE_DESCRIPTION_LIMIT, len(notes_content)), file=sys.stderr)
-        notes_content = notes_content_without_icon
+        if icon:
+            notes_content = notes_content.replace(icon, "", 1)
 
     try:
+        # Output is only inspected on failure - keep it as bytes.
+        # This short-lived script holds no fds worth closing; close_fds=False
+        # skips the per-fd close loop.
+        # The notes go in argv: pct set has no file or stdin option for the
+        # description, and without the icon they stay far below the 128 KiB
+        # per-argument limit.
         result = subprocess.run(
             ["pct", "set", vmid, "--description", notes_content],
+            stdin=subprocess.DEVNULL,
             capture_output=True,
-            text=True
+            close_fds=False,
         )
         if result.returncode != 0:
-            print("Warning: pct set failed: %s" % result.stderr, file=sys.stderr)
+            print("Warning: pct set failed: %s" % result.stderr.decode("utf-8", "replace"), file=sys.stderr)
         else:
             print("Notes written for container %s" % vmid, file=sys.stderr)
     except Exception as e:
@@ -0,0 +1,122 @@
+"""LXC Config Scan Library.
+
+Host helpers for the scripts that scan every container config:
+- Container status lookup via a single `pct list` call
+- Optional per-config result cache (LXC_MANAGER_CONF_CACHE_DIR)
+
+Prepended after lxc_config_parser_lib.py, which provides
+"from __future__ import annotations" - do not repeat it here.
+
+This is a library - import and use the functions, do not execute directly.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+from typing import Iterable
+
+
+def get_statuses() -> dict[int, str]:
+    """Get status of all containers with a single `pct list` call.
+
+    Expected format:
+        VMID       Status     Lock         Name
+        100        running                 my-container
+    """
+    try:
+        result = subprocess.run(
+            ["pct", "list"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        if result.returncode != 0:
+            return {}
+    except Exception:
+        return {}
+
+    statuses: dict[int, str] = {}
+    for line in result.stdout.splitlines()[1:]:
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].isdigit():
+            statuses[int(parts[0])] = parts[1]
+    return statuses
+
+
+# --- Per-config result cache (LXC_MANAGER_CONF_CACHE_DIR) ---
+
+# /etc/pve/lxc (pmxcfs) keeps whole-second mtimes: a same-size edit within the
+# second of a cached read would keep the key. Configs modified this recently
+# are not cached until their mtime can no longer repeat.
+_CACHE_MIN_AGE_NS = 2_000_000_000
+
+
+def conf_cache_key(entry: os.DirEntry) -> str | None:
+    """Cache key for a config file: changes whenever the file is modified.
+
+    Returns None if the file cannot be stat'ed or was modified too recently
+    to be cached.
+    """
+    try:
+        st = entry.stat(follow_symlinks=False)
+    except OSError:
+        return None
+    if time.time_ns() - st.st_mtime_ns < _CACHE_MIN_AGE_NS:
+        return None
+    raw = f"{entry.path}\0{st.st_mtime_ns}\0{st.st_size}".encode()
+    return hashlib.blake2s(raw, digest_size=16).hexdigest()
+
+
+def conf_cache_get(cache_dir: str, key: str, fields: dict[str, type | tuple[type, ...]]) -> dict | None:
+    """Load a cached result, returning None on a miss.
+
+    Entries that are not a dict or whose fields do not have the given types
+    (a missing field counts as None) are treated as a miss.
+    """
+    try:
+        with open(os.path.join(cache_dir, f"{key}.json"), "r", encoding="utf-8") as f:
+            info = json.load(f)
+    except Exception:
+        return None
+    if not isinstance(info, dict):
+        return None
+    for name, types in fields.items():
+        if not isinstance(info.get(name), types):
+            return None
+    return info
+
+
+def conf_cache_put(cache_dir: str, key: str, info: dict) -> None:
+    """Store a result; cache failures never affect the caller."""
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # A private temp file per writer: concurrent runs may store the same key
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        os.replace(tmp_path, os.path.join(cache_dir, f"{key}.json"))
+    except Exception:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def conf_cache_prune(cache_dir: str, live_keys: Iterable[str]) -> None:
+    """Remove entries of configs that were deleted or changed since caching.
+
+    Keeps the cache at one entry per current config file.
+    """
+    live = {f"{key}.json" for key in live_keys}
+    try:
+        with os.scandir(cache_dir) as it:
+            stale = [e.path for e in it if e.name.endswith(".json") and e.name not in live]
+        for path in stale:
+            os.unlink(path)
+    except Exception:
+        pass
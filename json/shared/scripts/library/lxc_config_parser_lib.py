@@ -6,11 +6,14 @@ Parses Proxmox LXC configuration files including:
 - Mount points, hostname, and other config
 
 This is a library - import and use the functions, do not execute directly.
+It is also prepended to host scripts and run by the PVE host's python3, so it
+must stay pure Python and stdlib-only (no compiled or optional accelerators).
 """
 
 from __future__ import annotations
 
 import re
+import sys
 from dataclasses import dataclass, field
 from typing import Any
 from urllib.parse import unquote
@@ -32,6 +35,49 @@ USERNAME_MARKER_RE = re.compile(r"(?:oci-lxc-deployer):username\s+(.+?)\s*-->",
 UID_MARKER_RE = re.compile(r"(?:oci-lxc-deployer):uid\s+(.+?)\s*-->", re.IGNORECASE)
 GID_MARKER_RE = re.compile(r"(?:oci-lxc-deployer):gid\s+(.+?)\s*-->", re.IGNORECASE)
 
+# All of the above as one alternation, so the notes are scanned once per text variant.
+# Each alternative has exactly one named group; match.lastgroup identifies the field.
+# The lookaheads keep the rest of each match zero-width: a visible line whose value
+# spills over into the next line (e.g. an empty "Version:") must not hide a marker
+# there, just as it would not with separate searches.
+# Every match consumes exactly one leading character - the "o" of a marker or the
+# newline before a visible line - so re can skip to candidates via that character
+# set instead of trying the lookaheads at every position. Scan "\n" + text so the
+# first line has a newline too (see _scan_notes).
+# The markers' common "oci-lxc-deployer:" prefix is matched once before branching
+# on the suffix, and the visible lines share their "\s*" / "#?\s*" lead-in.
+# Stays on stdlib re: this library is prepended to scripts run by the PVE host's
+# python3, where neither re2 nor regex is installed, and re2 has no lookahead.
+# Backtracking is bounded anyway, since every ".+?" stops at the end of its line.
+NOTES_RE = re.compile(
+    r"[oO\n](?i:"
+    r"(?<=[oO])(?=ci-lxc-deployer:(?:"
+    r"(?P<managed>managed)"
+    r"|oci-image\s+(?P<oci_marker>.+?)\s*-->"
+    r"|application-id\s+(?P<app_id_marker>.+?)\s*-->"
+    r"|application-name\s+(?P<app_name_marker>.+?)\s*-->"
+    r"|addon\s+(?P<addon>.+?)\s*-->"
+    r"|username\s+(?P<username>.+?)\s*-->"
+    r"|uid\s+(?P<uid>.+?)\s*-->"
+    r"|gid\s+(?P<gid>.+?)\s*-->"
+    r"))"
+    r"|(?<=\n)(?=\s*(?:"
+    r"OCI image:\s*(?P<oci_visible>.+?)"
+    r"|#?\s*(?:"
+    r"Application\s+ID\s*:\s*(?P<app_id_visible>.+?)"
+    r"|##\s+(?P<app_name_visible>.+?)"
+    r"|Version\s*:\s*(?P<version_visible>.+?)"
+    r"))\s*$))",
+    re.MULTILINE,
+)
+
+# Bound once: parse_lxc_config/is_managed_container run once per container config
+_notes_finditer = NOTES_RE.finditer
+_managed_search = MANAGED_RE.search
+
+# Casefolded literals - every NOTES_RE match contains at least one of them
+_NOTES_HINTS = ("oci-lxc-deployer:", "oci image:", "application", "##", "version")
+
 # --- Regex patterns for LXC config parsing ---
 
 # lxc.idmap: u 0 100000 65536
@@ -56,7 +102,32 @@ ROOTFS_RE = re.compile(r"^rootfs:\s*([^:]+):([^,]+)(?:,size=(\d+)([GMK]?))?", re
 NET_BRIDGE_RE = re.compile(r"^net\d+:.*bridge=([^,\s]+)", re.MULTILINE)
 
 
-@dataclass
+# Scalar/list fields emitted by LxcConfig.to_dict, in output order.
+# keep_falsy: emit 0 as well (only None is omitted); otherwise falsy values are omitted.
+_TO_DICT_FIELDS: tuple[tuple[str, bool], ...] = (
+    ("hostname", False),
+    ("oci_image", False),
+    ("application_id", False),
+    ("application_name", False),
+    ("version", False),
+    ("addons", False),
+    ("username", False),
+    ("uid", False),
+    ("gid", False),
+    ("memory", True),
+    ("cores", True),
+    ("rootfs_storage", False),
+    ("disk_size", False),
+    ("bridge", False),
+)
+
+
+# __slots__ (no per-instance __dict__) where supported; the PVE host's python3
+# may predate dataclass(slots=True), which needs Python 3.10
+_DATACLASS_OPTIONS: dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class IdMapping:
     """Represents an lxc.idmap entry."""
     type: str  # 'u' for uid, 'g' for gid
@@ -65,7 +136,7 @@ class IdMapping:
     range_size: int
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class MountPoint:
     """Represents an LXC mount point (mp0, mp1, etc.)."""
     index: int
@@ -74,12 +145,11 @@ class MountPoint:
     options: str | None = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class LxcConfig:
     """Parsed LXC configuration."""
-    # Raw config text
+    # Raw config text (the caller's string, not a copy)
     raw_text: str = ""
-    decoded_text: str = ""
 
     # Basic properties
     hostname: str | None = None
@@ -113,34 +183,10 @@ class LxcConfig:
         result: dict[str, Any] = {
             "is_managed": self.is_managed,
         }
-        if self.hostname:
-            result["hostname"] = self.hostname
-        if self.oci_image:
-            result["oci_image"] = self.oci_image
-        if self.application_id:
-            result["application_id"] = self.application_id
-        if self.application_name:
-            result["application_name"] = self.application_name
-        if self.version:
-            result["version"] = self.version
-        if self.addons:
-            result["addons"] = self.addons
-        if self.username:
-            result["username"] = self.username
-        if self.uid:
-            result["uid"] = self.uid
-        if self.gid:
-            result["gid"] = self.gid
-        if self.memory is not None:
-            result["memory"] = self.memory
-        if self.cores is not None:
-            result["cores"] = self.cores
-        if self.rootfs_storage:
-            result["rootfs_storage"] = self.rootfs_storage
-        if self.disk_size:
-            result["disk_size"] = self.disk_size
-        if self.bridge:
-            result["bridge"] = self.bridge
+        for name, keep_falsy in _TO_DICT_FIELDS:
+            value = getattr(self, name)
+            if value or (keep_falsy and value is not None):
+                result[name] = value
         if self.id_mappings:
             result["id_mappings"] = [
                 {
@@ -164,32 +210,78 @@ class LxcConfig:
         return result
 
 
-def _extract_from_patterns(text: str, patterns: list[re.Pattern[str]]) -> str | None:
-    """Try multiple patterns and return the first match."""
-    for pattern in patterns:
-        m = pattern.search(text)
-        if m:
-            val = m.group(1).strip()
-            if val:
-                return val
-    return None
-
+def _scan_notes(text: str) -> tuple[dict[str, str], list[str]]:
+    """Scan notes text once with NOTES_RE.
 
-def _extract_all_matches(text: str, pattern: re.Pattern[str]) -> list[str]:
-    """Extract all matches from a pattern."""
-    matches = pattern.findall(text)
-    return [m.strip() for m in matches if m.strip()]
+    Returns the stripped value of the first match per field (like a single
+    pattern.search) and all non-empty addon values in order.
+    """
+    first: dict[str, str] = {}
+    addons: list[str] = []
+    text = "\n" + text  # NOTES_RE expects a newline before every line
+    addon_end = 0
+    for m in _notes_finditer(text):
+        name = m.lastgroup
+        if name == "addon":
+            # Like findall: skip addon markers inside the previous addon match
+            if m.start() < addon_end:
+                continue
+            addon_end = text.find("-->", m.end(name)) + 3
+            addon = m.group(name).strip()
+            if addon:
+                addons.append(addon)
+        elif name not in first:
+            first[name] = m.group(name).strip()
+    return first, addons
 
 
 def _normalize_config_text(conf_text: str) -> str:
     """Normalize config text by expanding escaped newlines."""
     # Proxmox LXC config "description:" lines often encode newlines as literal "\\n"
-    return conf_text.replace("\\n", "\n")
+    # Returns the same object when there is nothing to expand
+    return conf_text.replace("\\n", "\n") if "\\n" in conf_text else conf_text
 
 
 def _decode_config_text(conf_text: str) -> str:
-    """URL-decode config text (for description field)."""
-    return unquote(conf_text)
+    """URL-decode config text (for the notes lines)."""
+    # Returns the same object when there is nothing to decode
+    return conf_text if "%" not in conf_text else unquote(conf_text)
+
+
+def _extract_notes_text(conf_text: str) -> str:
+    """Return the notes lines of a config: "description:" and "#" comment lines."""
+    return "\n".join(
+        line for line in conf_text.split("\n")
+        if line.startswith(("#", "description:"))
+    )
+
+
+def _prep(conf_text: str) -> tuple[str, str | None, str | None, bool, bool]:
+    """Normalize and decode config text and check the managed marker.
+
+    Shared by parse_lxc_config and is_managed_container.
+
+    Returns:
+        (normalized, notes, decoded notes, is_managed, has_notes); notes and
+        decoded notes are None if nothing was encoded; has_notes is False if
+        NOTES_RE cannot match the normalized text
+    """
+    normalized = _normalize_config_text(conf_text)
+    if "%" in conf_text:
+        # Only the notes are URL-encoded; decode just those lines
+        notes = _normalize_config_text(_extract_notes_text(conf_text))
+        decoded = _decode_config_text(notes)
+        if decoded != notes:
+            is_managed = bool(_managed_search(normalized) or _managed_search(decoded))
+            return normalized, notes, decoded, is_managed, True
+    # Casefolded once for the marker and the hints; normalizing only turns
+    # "\\n" into newlines, which none of them contain
+    folded = conf_text.casefold()
+    # Without percent-encoding, only the literal marker can match
+    is_managed = "oci-lxc-deployer:" in folded and bool(_managed_search(normalized))
+    # Substring checks are far cheaper than the NOTES_RE scan
+    has_notes = any(hint in folded for hint in _NOTES_HINTS)
+    return normalized, None, None, is_managed, has_notes
 
 
 def parse_id_mappings(conf_text: str) -> list[IdMapping]:
@@ -218,110 +310,224 @@ def parse_mount_points(conf_text: str) -> list[MountPoint]:
     return sorted(mount_points, key=lambda mp: mp.index)
 
 
-def parse_lxc_config(conf_text: str) -> LxcConfig:
+# Config keys that hold a single value; only their first line is used
+_SINGLE_VALUE_KEYS = frozenset(("hostname", "memory", "cores", "rootfs"))
+
+
+def _bridge_from_net(rest: str) -> str | None:
+    """Return the last non-empty bridge= value of a net line (NET_BRIDGE_RE semantics)."""
+    pos = rest.rfind("bridge=")
+    while pos != -1:
+        value = rest[pos + 7:].split(",", 1)[0]
+        if value and not value[0].isspace():
+            return value.split(None, 1)[0]
+        pos = rest.rfind("bridge=", 0, pos + 6)
+    return None
+
+
+def _rootfs_from_line(rest: str) -> tuple[str, str | None] | None:
+    """Return (storage, disk_size) for a canonical rootfs value, else None."""
+    value = rest.lstrip()
+    idx = value.find(":")
+    volume = value[idx + 1:] if idx > 0 else ""
+    comma = volume.find(",")
+    if comma <= 0:
+        # ROOTFS_RE may continue on the next line here
+        return None
+    disk_size = None
+    options = volume[comma + 1:]
+    if options.startswith("size="):
+        size = options[5:]
+        n = 0
+        while n < len(size) and size[n].isdecimal():
+            n += 1
+        if n:
+            unit = size[n] if n < len(size) and size[n] in "GMK" else "G"
+            disk_size = f"{size[:n]}{unit}"
+    return value[:idx], disk_size
+
+
+def _parse_structured_lines(normalized: str, config: LxcConfig) -> None:
+    """Parse LXC config entries in a single pass over the lines.
+
+    Collects id mappings, mount points, bridge and the single-value keys
+    from the normalized text; the notes are parsed separately.
+
+    Canonical entries are handled with plain string operations. Anything
+    else (e.g. an empty value, where the regex would continue on the next
+    line) makes that field fall back to its regex over the whole text.
+    """
+    fallback: set[str] = set()
+    single: dict[str, str] = {}
+    id_mappings: list[IdMapping] = []
+    mount_points: list[MountPoint] = []
+
+    for line in normalized.split("\n"):
+        key, sep, rest = line.partition(":")
+        if not sep or key in fallback:
+            continue
+        if key == "lxc.idmap":
+            parts = rest.split()
+            if (
+                len(parts) == 4 and parts[0] in ("u", "g")
+                and parts[1].isdecimal() and parts[2].isdecimal() and parts[3].isdecimal()
+            ):
+                id_mappings.append(IdMapping(
+                    type=parts[0],
+                    container_start=int(parts[1]),
+                    host_start=int(parts[2]),
+                    range_size=int(parts[3]),
+                ))
+            else:
+                fallback.add(key)
+        elif key.startswith("mp") and key[2:].isdecimal():
+            if "mp" in fallback:
+                continue
+            value = rest.lstrip()
+            idx = value.find(",mp=", 1)
+            target = value[idx + 4:] if idx > 0 else ""
+            if not target:
+                fallback.add("mp")
+                continue
+            comma = target.find(",", 1)
+            options = None
+            if comma != -1:
+                options = target[comma + 1:] or None
+                target = target[:comma]
+            mount_points.append(MountPoint(
+                index=int(key[2:]),
+                source=value[:idx],
+                target=target,
+                options=options,
+            ))
+        elif key.startswith("net") and key[3:].isdecimal():
+            if config.bridge is None:
+                config.bridge = _bridge_from_net(rest)
+        elif key in _SINGLE_VALUE_KEYS:
+            # Only the first occurrence is needed
+            if key not in single:
+                single[key] = rest
+
+    # Single-value keys: a non-canonical first value falls back to the regex,
+    # which also finds a later valid line (e.g. after "memory: abc")
+    if "hostname" in single:
+        config.hostname = single["hostname"].strip() or None
+        if config.hostname is None:
+            fallback.add("hostname")
+    for key in ("memory", "cores"):
+        if key in single:
+            value = single[key].strip()
+            if value.isdecimal():
+                setattr(config, key, int(value))
+            else:
+                fallback.add(key)
+    if "rootfs" in single:
+        rootfs = _rootfs_from_line(single["rootfs"])
+        if rootfs is None:
+            fallback.add("rootfs")
+        else:
+            config.rootfs_storage, config.disk_size = rootfs
+
+    config.id_mappings = (
+        parse_id_mappings(normalized) if "lxc.idmap" in fallback else id_mappings
+    )
+    config.mount_points = (
+        parse_mount_points(normalized) if "mp" in fallback
+        else sorted(mount_points, key=lambda mp: mp.index)
+    )
+    if not fallback:
+        return
+
+    # Fallbacks: first regex match over the whole text, as before
+    if "hostname" in fallback:
+        hostname_match = HOSTNAME_RE.search(normalized)
+        config.hostname = hostname_match.group(1).strip() or None if hostname_match else None
+
+    if "memory" in fallback:
+        memory_match = MEMORY_RE.search(normalized)
+        config.memory = int(memory_match.group(1)) if memory_match else None
+
+    if "cores" in fallback:
+        cores_match = CORES_RE.search(normalized)
+        config.cores = int(cores_match.group(1)) if cores_match else None
+
+    if "rootfs" in fallback:
+        rootfs_match = ROOTFS_RE.search(normalized)
+        if rootfs_match:
+            config.rootfs_storage = rootfs_match.group(1)
+            size_val = rootfs_match.group(3)
+            size_unit = rootfs_match.group(4) or "G"
+            if size_val:
+                config.disk_size = f"{size_val}{size_unit}"
+
+
+def parse_lxc_config(conf_text: str, managed_only: bool = False) -> LxcConfig:
     """Parse a complete LXC configuration file.
 
     Args:
         conf_text: Raw content of the .conf file
+        managed_only: Skip the full parse for unmanaged containers; only
+            raw_text and is_managed (False) are set for them
 
     Returns:
         LxcConfig object with all parsed data
     """
-    config = LxcConfig()
-    config.raw_text = conf_text
-
     # Normalize and decode for notes parsing
-    normalized = _normalize_config_text(conf_text)
-    decoded = _decode_config_text(normalized)
-    config.decoded_text = decoded
+    normalized, notes, decoded, is_managed, has_notes = _prep(conf_text)
+    if managed_only and not is_managed:
+        return LxcConfig(raw_text=conf_text)
 
-    # Check if managed
-    config.is_managed = bool(
-        MANAGED_RE.search(normalized) or MANAGED_RE.search(decoded)
-    )
-
-    # Parse hostname (from config, not notes)
-    hostname_match = HOSTNAME_RE.search(normalized)
-    if hostname_match:
-        config.hostname = hostname_match.group(1).strip() or None
+    config = LxcConfig()
+    config.raw_text = conf_text
+    config.is_managed = is_managed
+
+    # Scan notes once per text variant; decoded values take precedence,
+    # and within a variant the hidden marker wins over the visible line
+    # Identical texts (nothing was decoded) are scanned only once; otherwise
+    # the undecoded fallback only needs the notes lines, not the whole config
+    if decoded is None:
+        d, addons_decoded = _scan_notes(normalized) if has_notes else ({}, [])
+        n, addons_normalized = d, []
+    else:
+        d, addons_decoded = _scan_notes(decoded)
+        n, addons_normalized = _scan_notes(notes)
 
-    # Parse OCI image from notes
+    # Parse application info from notes
     config.oci_image = (
-        _extract_from_patterns(decoded, [OCI_MARKER_RE, OCI_VISIBLE_RE]) or
-        _extract_from_patterns(normalized, [OCI_MARKER_RE, OCI_VISIBLE_RE])
+        d.get("oci_marker") or d.get("oci_visible") or
+        n.get("oci_marker") or n.get("oci_visible") or None
     )
-
-    # Parse application info from notes
     config.application_id = (
-        _extract_from_patterns(decoded, [APP_ID_MARKER_RE, APP_ID_VISIBLE_RE]) or
-        _extract_from_patterns(normalized, [APP_ID_MARKER_RE, APP_ID_VISIBLE_RE])
+        d.get("app_id_marker") or d.get("app_id_visible") or
+        n.get("app_id_marker") or n.get("app_id_visible") or None
     )
-
     config.application_name = (
-        _extract_from_patterns(decoded, [APP_NAME_MARKER_RE, APP_NAME_VISIBLE_RE]) or
-        _extract_from_patterns(normalized, [APP_NAME_MARKER_RE, APP_NAME_VISIBLE_RE])
-    )
-
-    config.version = (
-        _extract_from_patterns(decoded, [VERSION_VISIBLE_RE]) or
-        _extract_from_patterns(normalized, [VERSION_VISIBLE_RE])
+        d.get("app_name_marker") or d.get("app_name_visible") or
+        n.get("app_name_marker") or n.get("app_name_visible") or None
     )
+    config.version = d.get("version_visible") or n.get("version_visible") or None
 
     # Parse addons from notes (can have multiple)
-    addons_decoded = _extract_all_matches(decoded, ADDON_MARKER_RE)
-    addons_normalized = _extract_all_matches(normalized, ADDON_MARKER_RE)
     # Combine and deduplicate while preserving order
-    seen = set()
-    config.addons = []
-    for addon in addons_decoded + addons_normalized:
-        if addon not in seen:
-            seen.add(addon)
-            config.addons.append(addon)
+    if addons_normalized:
+        addons_decoded += addons_normalized
+    config.addons = list(dict.fromkeys(addons_decoded))
 
     # Parse user/permission info from notes (for addon reconfiguration)
-    config.username = (
-        _extract_from_patterns(decoded, [USERNAME_MARKER_RE]) or
-        _extract_from_patterns(normalized, [USERNAME_MARKER_RE])
-    )
-    config.uid = (
-        _extract_from_patterns(decoded, [UID_MARKER_RE]) or
-        _extract_from_patterns(normalized, [UID_MARKER_RE])
-    )
-    config.gid = (
-        _extract_from_patterns(decoded, [GID_MARKER_RE]) or
-        _extract_from_patterns(normalized, [GID_MARKER_RE])
-    )
+    config.username = d.get("username") or n.get("username") or None
+    config.uid = d.get("uid") or n.get("uid") or None
+    config.gid = d.get("gid") or n.get("gid") or None
 
-    # Parse LXC config entries (from raw/normalized, not decoded)
-    config.id_mappings = parse_id_mappings(normalized)
-    config.mount_points = parse_mount_points(normalized)
-
-    # Parse container resource settings from LXC config
-    memory_match = MEMORY_RE.search(normalized)
-    if memory_match:
-        config.memory = int(memory_match.group(1))
-
-    cores_match = CORES_RE.search(normalized)
-    if cores_match:
-        config.cores = int(cores_match.group(1))
-
-    rootfs_match = ROOTFS_RE.search(normalized)
-    if rootfs_match:
-        config.rootfs_storage = rootfs_match.group(1)
-        size_val = rootfs_match.group(3)
-        size_unit = rootfs_match.group(4) or "G"
-        if size_val:
-            config.disk_size = f"{size_val}{size_unit}"
-
-    bridge_match = NET_BRIDGE_RE.search(normalized)
-    if bridge_match:
-        config.bridge = bridge_match.group(1)
+    # Parse LXC config entries and resource settings (from normalized, not decoded)
+    _parse_structured_lines(normalized, config)
 
     return config
 
 
 def is_managed_container(conf_text: str) -> bool:
     """Quick check if a config file represents a managed container."""
-    normalized = _normalize_config_text(conf_text)
-    decoded = _decode_config_text(normalized)
-    return bool(MANAGED_RE.search(normalized) or MANAGED_RE.search(decoded))
+    # Substring check first; normalizing, decoding and regex only when undecided
+    if "oci-lxc-deployer:managed" in conf_text:
+        return True
+    return _prep(conf_text)[3]
+
@@ -6,8 +6,9 @@ Therefore it must not rely on package imports from the filesystem.
 """
 
 import json
-import os
+import math
 import sys
+from bisect import bisect_left, bisect_right
 from pathlib import Path
 from typing import Iterable, List, Tuple
 
@@ -25,9 +26,19 @@ def parse_ids(id_str: str) -> List[int]:
     Treats "0" or empty as "not set".
     """
 
-    if not id_str or id_str.strip() == "" or id_str.strip() == "0":
+    if not id_str or id_str.strip() in ("", "0"):
         return []
-    return sorted({int(x.strip()) for x in id_str.split(",") if x.strip()})
+    ids: List[int] = []
+    for token in id_str.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        value = int(token)
+        # Keep the list sorted and unique while parsing
+        idx = bisect_left(ids, value)
+        if idx == len(ids) or ids[idx] != value:
+            ids.insert(idx, value)
+    return ids
 
 
 
@@ -74,7 +85,7 @@ def calculate_idmap_entries(ids: Iterable[int], kind: str) -> List[str]:
     if not ids_list:
         return []
 
-    idmap_entries: List[str] = []
+    ranges: List[Tuple[int, int, int]] = []
     host_offset = STANDARD_START  # Start of shifted range on host
 
     current_container_id = 0
@@ -82,19 +93,20 @@ def calculate_idmap_entries(ids: Iterable[int], kind: str) -> List[str]:
         # Add shifted range before this passthrough ID (if any gap exists)
         if current_container_id < passthrough_id:
             count = passthrough_id - current_container_id
-            idmap_entries.append(f"lxc.idmap: {kind} {current_container_id} {host_offset} {count}")
+            ranges.append((current_container_id, host_offset, count))
             host_offset += count
 
         # Add 1:1 passthrough for this ID
-        idmap_entries.append(f"lxc.idmap: {kind} {passthrough_id} {passthrough_id} 1")
+        ranges.append((passthrough_id, passthrough_id, 1))
         current_container_id = passthrough_id + 1
 
     # Add remaining shifted range after last passthrough ID
     if current_container_id <= 65535:
         count = 65536 - current_container_id
-        idmap_entries.append(f"lxc.idmap: {kind} {current_container_id} {host_offset} {count}")
+        ranges.append((current_container_id, host_offset, count))
 
-    return idmap_entries
+    line_format = "lxc.idmap: " + kind + " %d %d %d"
+    return [line_format % entry for entry in ranges]
 
 
 def update_file(filepath: str, entries: List[str]) -> None:
@@ -102,15 +114,17 @@ def update_file(filepath: str, entries: List[str]) -> None:
 
     Path(filepath).parent.mkdir(parents=True, exist_ok=True)
 
-    existing = set()
-    if os.path.exists(filepath):
-        with open(filepath, "r", encoding="utf-8") as file_handle:
-            existing = {line.strip() for line in file_handle if line.strip()}
+    # One open for reading and appending; "a+" creates the file if missing,
+    # so no separate exists() stat (a round-trip on pmxcfs, /etc/pve)
+    with open(filepath, "a+", encoding="utf-8") as file_handle:
+        file_handle.seek(0)
+        # Split on "\n" only, as iterating the file did; see update_lxc_config_kind
+        existing = {line.strip() for line in file_handle.read().split("\n") if line.strip()}
 
-    with open(filepath, "a", encoding="utf-8") as file_handle:
-        for entry in entries:
-            if entry not in existing:
-                file_handle.write(entry + "\n")
+        missing = [entry for entry in entries if entry not in existing]
+        if missing:
+            # Writes in "a" mode always go to the end, whatever the read position
+            file_handle.write("\n".join(missing) + "\n")
 
 
 def update_lxc_config_kind(config_path: Path, kind: str, idmap_entries: List[str]) -> None:
@@ -124,31 +138,28 @@ def update_lxc_config_kind(config_path: Path, kind: str, idmap_entries: List[str
 
     config_path.parent.mkdir(parents=True, exist_ok=True)
 
-    if not config_path.exists():
-        config_path.write_text("", encoding="utf-8")
-
-    with open(config_path, "r", encoding="utf-8") as file_handle:
-        lines = file_handle.readlines()
+    try:
+        text = config_path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        text = ""
 
     def is_target_idmap_line(line: str) -> bool:
-        s = line.strip()
-        if not s.startswith("lxc.idmap"):
+        # Cheap prefix test first; only lxc.idmap lines are tokenized
+        if not line.lstrip().startswith("lxc.idmap"):
             return False
-        parts = s.replace("=", ":").split()
         # Expected: lxc.idmap: u 0 100000 65536
-        # parts[0] startswith lxc.idmap
-        if len(parts) < 3:
-            return False
-        return parts[1] == kind
+        parts = line.split(None, 2)
+        return len(parts) == 3 and parts[1] == kind
 
-    lines = [line for line in lines if not is_target_idmap_line(line)]
+    # Split on "\n" only, like readlines() did; splitlines() would also break on \f, \x85, ...
+    lines = text.split("\n")
+    last = lines.pop()  # "" unless the file lacks a trailing newline
+    kept = "".join(line + "\n" for line in lines if not is_target_idmap_line(line))
+    if not is_target_idmap_line(last):
+        kept += last
 
     # Append entries at end (consistent with previous script behavior)
-    for entry in idmap_entries:
-        lines.append(entry + "\n")
-
-    with open(config_path, "w", encoding="utf-8") as file_handle:
-        file_handle.writelines(lines)
+    config_path.write_text(kept + "".join(entry + "\n" for entry in idmap_entries), encoding="utf-8")
 
 
 def parse_idmap_lines(lines: List[str], kind: str) -> List[Tuple[int, int, int]]:
@@ -159,15 +170,11 @@ def parse_idmap_lines(lines: List[str], kind: str) -> List[Tuple[int, int, int]]
 
     result: List[Tuple[int, int, int]] = []
     for line in lines:
-        s = line.strip()
-        if not s.startswith("lxc.idmap"):
-            continue
-        s = s.replace("=", ":")
-        parts = [p for p in s.split() if p]
-        if len(parts) < 5:
+        if not line.lstrip().startswith("lxc.idmap"):
             continue
+        parts = line.split()
         # parts example: ['lxc.idmap:', 'u', '0', '100000', '65536']
-        if parts[1] != kind:
+        if len(parts) < 5 or parts[1] != kind:
             continue
         try:
             c_start = int(parts[2])
@@ -192,8 +199,15 @@ def detect_unprivileged_from_config(lines: List[str]) -> bool:
 
 
 def compute_host_id_for_container_id(container_id: int, idmap_segments: List[Tuple[int, int, int]], unprivileged: bool) -> int:
-    for c_start, h_start, rng in idmap_segments:
-        if c_start <= container_id < c_start + rng:
+    """Map a container ID to its host ID.
+
+    idmap_segments must be sorted by container start and non-overlapping,
+    as returned by parse_idmap_lines for a valid config.
+    """
+    idx = bisect_right(idmap_segments, (container_id, math.inf)) - 1
+    if idx >= 0:
+        c_start, h_start, rng = idmap_segments[idx]
+        if container_id < c_start + rng:
             return h_start + (container_id - c_start)
     if unprivileged:
         return STANDARD_START + container_id
@@ -9,7 +9,14 @@ for containers that:
 Outputs a single VeExecution output id `containers` whose value is a JSON string
 representing an array of objects: { vm_id, hostname?, oci_image, icon, addons?, ... }.
 
-Requires lxc_config_parser_lib.py to be prepended via library parameter.
+Requires lxc_config_parser_lib.py and lxc_conf_scan_lib.py to be prepended
+(in that order) as the library.
+
+Environment:
+  - LXC_MANAGER_CONF_CACHE_DIR: Optional directory for caching per-config
+    listing entries keyed by (path, mtime, size) across invocations. Opt-in:
+    the backend does not set it. Configs modified within the last two
+    seconds are not cached, since pmxcfs mtimes only have whole seconds.
 
 Note: Do NOT add "from __future__ import annotations" here - it's already in the library
 and must be at the very beginning of the combined file.
@@ -17,113 +24,143 @@ and must be at the very beginning of the combined file.
 
 import json
 import os
-import subprocess
 from concurrent.futures import ThreadPoolExecutor
-from pathlib import Path
 
 # Library functions are prepended - these are available:
-# - parse_lxc_config(conf_text) -> LxcConfig
-# - is_managed_container(conf_text) -> bool
+# - parse_lxc_config(conf_text, managed_only=False) -> LxcConfig
+# - get_statuses() -> dict[int, str] (lxc_conf_scan_lib.py)
+# - conf_cache_key/get/put/prune for LXC_MANAGER_CONF_CACHE_DIR (lxc_conf_scan_lib.py)
 
 
-def get_status(vmid: int) -> str | None:
+def _read_conf(path: str) -> str | None:
+    """Read a config file as text, returning None if it cannot be read."""
     try:
-        result = subprocess.run(
-            ["pct", "status", str(vmid)],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if result.returncode != 0:
-            return None
-        out = result.stdout.strip()
-        # Expected format: "status: running" or "status: stopped"
-        if "status:" in out:
-            return out.split("status:", 1)[1].strip() or None
-        return out or None
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
     except Exception:
         return None
 
 
-def main() -> None:
-    base_dir = Path(os.environ.get("LXC_MANAGER_PVE_LXC_DIR", "/etc/pve/lxc"))
+def build_item(vmid: int, conf_text: str) -> dict | None:
+    """Build the listing entry for one config, or None if it is not listed."""
+    # Managed check and full parse in one call (unmanaged configs are not parsed)
+    config = parse_lxc_config(conf_text, managed_only=True)
 
-    containers: list[dict] = []
+    if not config.is_managed or not config.oci_image:
+        return None
 
-    if base_dir.is_dir():
-        # Stable order by vmid
-        for conf_path in sorted(base_dir.glob("*.conf"), key=lambda p: p.name):
-            vmid_str = conf_path.stem
-            if not vmid_str.isdigit():
-                continue
+    item = {
+        "vm_id": vmid,
+        "oci_image": config.oci_image,
+        "icon": "",
+    }
+    if config.hostname:
+        item["hostname"] = config.hostname
+    if config.application_id:
+        item["application_id"] = config.application_id
+    if config.application_name:
+        item["application_name"] = config.application_name
+    if config.version:
+        item["version"] = config.version
+    if config.addons:
+        item["addons"] = config.addons
+    # User/permission info for addon reconfiguration
+    if config.username:
+        item["username"] = config.username
+    if config.uid:
+        item["uid"] = config.uid
+    if config.gid:
+        item["gid"] = config.gid
+    # Container resource settings
+    if config.memory is not None:
+        item["memory"] = config.memory
+    if config.cores is not None:
+        item["cores"] = config.cores
+    if config.rootfs_storage:
+        item["rootfs_storage"] = config.rootfs_storage
+    if config.disk_size:
+        item["disk_size"] = config.disk_size
+    if config.bridge:
+        item["bridge"] = config.bridge
+    # Mount points for existing volumes display
+    if config.mount_points:
+        item["mount_points"] = [
+            {"source": mp.source, "target": mp.target}
+            for mp in config.mount_points
+        ]
+    return item
 
-            try:
-                conf_text = conf_path.read_text(encoding="utf-8", errors="replace")
-            except Exception:
-                continue
 
-            # Quick check before full parsing
-            if not is_managed_container(conf_text):
-                continue
+def main() -> None:
+    base_dir = os.environ.get("LXC_MANAGER_PVE_LXC_DIR", "/etc/pve/lxc")
+
+    containers: list[dict] = []
 
-            # Full parse
-            config = parse_lxc_config(conf_text)
+    # Optional cache of listing entries keyed by file path, mtime and size.
+    # Kept in a subdirectory: find-containers-by-app-id.py stores other data per file.
+    cache_dir = os.environ.get("LXC_MANAGER_CONF_CACHE_DIR") or None
+    if cache_dir:
+        cache_dir = os.path.join(cache_dir, "list-managed")
 
-            if not config.oci_image:
+    if os.path.isdir(base_dir):
+        # Stable order by vmid
+        with os.scandir(base_dir) as it:
+            entries = sorted(
+                (e for e in it if e.name.endswith(".conf") and e.name[:-5].isdigit()),
+                key=lambda e: e.name,
+            )
+
+        keys: dict[str, str] = {}
+        items: dict[str, dict | None] = {}
+        if cache_dir:
+            for entry in entries:
+                key = conf_cache_key(entry)
+                if key is None:
+                    continue
+                keys[entry.path] = key
+                cached = conf_cache_get(cache_dir, key, {"item": (dict, type(None))})
+                if cached is not None:
+                    items[entry.path] = cached["item"]
+
+        # /etc/pve/lxc is backed by pmxcfs (FUSE) - overlap the read round-trips.
+        # Each worker keeps one open+read in flight; opening all files up front
+        # from one thread would still wait for every read in turn.
+        to_read = [e for e in entries if e.path not in items]
+        paths = [e.path for e in to_read]
+        if len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(paths))) as executor:
+                texts = list(executor.map(_read_conf, paths))
+        else:
+            texts = [_read_conf(p) for p in paths]
+
+        # Parsing stays serial: for a host's worth of configs, forking worker
+        # processes costs more than it saves, and the pmxcfs reads dominate
+        for entry, conf_text in zip(to_read, texts):
+            if conf_text is None:
                 continue
+            item = build_item(int(entry.name[:-5]), conf_text)
+            items[entry.path] = item
+            if entry.path in keys:
+                conf_cache_put(cache_dir, keys[entry.path], {"item": item})
+
+        if cache_dir:
+            conf_cache_prune(cache_dir, keys.values())
 
-            item = {
-                "vm_id": int(vmid_str),
-                "oci_image": config.oci_image,
-                "icon": "",
-            }
-            if config.hostname:
-                item["hostname"] = config.hostname
-            if config.application_id:
-                item["application_id"] = config.application_id
-            if config.application_name:
-                item["application_name"] = config.application_name
-            if config.version:
-                item["version"] = config.version
-            if config.addons:
-                item["addons"] = config.addons
-            # User/permission info for addon reconfiguration
-            if config.username:
-                item["username"] = config.username
-            if config.uid:
-                item["uid"] = config.uid
-            if config.gid:
-                item["gid"] = config.gid
-            # Container resource settings
-            if config.memory is not None:
-                item["memory"] = config.memory
-            if config.cores is not None:
-                item["cores"] = config.cores
-            if config.rootfs_storage:
-                item["rootfs_storage"] = config.rootfs_storage
-            if config.disk_size:
-                item["disk_size"] = config.disk_size
-            if config.bridge:
-                item["bridge"] = config.bridge
-            # Mount points for existing volumes display
-            if config.mount_points:
-                item["mount_points"] = [
-                    {"source": mp.source, "target": mp.target}
-                    for mp in config.mount_points
-                ]
-
-            containers.append(item)
+        for entry in entries:
+            item = items.get(entry.path)
+            if item:
+                containers.append(item)
 
     if containers:
-        max_workers = min(8, len(containers))
-        vmids = [item["vm_id"] for item in containers]
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            statuses = list(executor.map(get_status, vmids))
-        for item, status in zip(containers, statuses):
+        statuses = get_statuses()
+        for item in containers:
+            status = statuses.get(item.get("vm_id"))
             if status:
                 item["status"] = status
 
     # Return output in VeExecution format: IOutput[]
+    # Stdlib json only: the PVE host python3 has no orjson, and an optional
+    # encoder would make the output bytes depend on the host
     print(json.dumps([{"id": "containers", "value": json.dumps(containers)}]))
 
 
@@ -21,6 +21,16 @@ except ImportError:
     print("Error: PyYAML is required. Install it with: pip install pyyaml or apt install python3-yaml", file=sys.stderr)
     sys.exit(1)
 
+# Prefer the libyaml-backed loader; it is still a safe loader (no arbitrary objects)
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+# [host_ip:]host_port:container_port[/protocol] - the last two ':'-separated
+# fields are the ports (host_ip may itself contain ':', e.g. "[::1]")
+_PORT_RE = re.compile(r"(?:.*:)?(?P<host>[^:]*):(?P<container>[^:/]*)[^:]*\Z", re.DOTALL)
+
 def eprint(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
 
@@ -33,11 +43,9 @@ def extract_port_mappings(services):
                 # Port spec can be: "8080:80", "8080:80/tcp", "127.0.0.1:8080:80"
                 if isinstance(port_spec, str):
                     # Parse format: [host_ip:]host_port:container_port[/protocol]
-                    parts = port_spec.split(":")
-                    if len(parts) >= 2:
-                        container_port = parts[-1].split("/")[0]
-                        host_port = parts[-2] if len(parts) > 1 else parts[0]
-                        ports.append(f"{service_name}:{host_port}->{container_port}")
+                    match = _PORT_RE.match(port_spec)
+                    if match:
+                        ports.append(f"{service_name}:{match['host']}->{match['container']}")
                 elif isinstance(port_spec, dict):
                     # Format: {"published": 8080, "target": 80, "protocol": "tcp"}
                     host_port = str(port_spec.get("published", ""))
@@ -66,14 +74,14 @@ def main():
     
     # Decode base64 compose file
     try:
-        compose_file_content = base64.b64decode(compose_file_base64).decode('utf-8')
+        compose_file_bytes = base64.b64decode(compose_file_base64)
     except Exception as e:
         eprint(f"Error: Failed to decode compose file: {e}")
         sys.exit(1)
     
-    # Parse YAML
+    # Parse YAML (the loader decodes UTF-8 bytes itself - no intermediate str copy)
     try:
-        compose_data = yaml.safe_load(compose_file_content)
+        compose_data = yaml.load(compose_file_bytes, Loader=_SafeLoader)
     except Exception as e:
         eprint(f"Error: Failed to parse YAML: {e}")
         sys.exit(1)
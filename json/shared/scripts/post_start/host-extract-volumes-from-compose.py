@@ -23,6 +23,14 @@ except ImportError:
     print("Error: PyYAML is required. Install it with: pip install pyyaml or apt install python3-yaml", file=sys.stderr)
     sys.exit(1)
 
+# Prefer the libyaml-backed loader; it is still a safe loader (no arbitrary objects).
+# PyYAML (python3-yaml) is the only YAML parser available on PVE hosts, so no
+# other backends (e.g. native streaming parsers) are probed.
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
 def eprint(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
 
@@ -41,14 +49,14 @@ def main():
     
     # Decode base64 compose file
     try:
-        compose_file_content = base64.b64decode(compose_file_base64).decode('utf-8')
+        compose_file_bytes = base64.b64decode(compose_file_base64)
     except Exception as e:
         eprint(f"Error: Failed to decode compose file: {e}")
         sys.exit(1)
     
-    # Parse YAML
+    # Parse YAML (the loader decodes UTF-8 bytes itself - no intermediate str copy)
     try:
-        compose_data = yaml.safe_load(compose_file_content)
+        compose_data = yaml.load(compose_file_bytes, Loader=_SafeLoader)
     except Exception as e:
         eprint(f"Error: Failed to parse YAML: {e}")
         sys.exit(1)
@@ -66,8 +74,7 @@ def main():
             first_service = list(compose_data["services"].keys())[0]
             compose_project = first_service.replace("_", "-")
     
-    volumes_list = []
-    volume_names = set()
+    volumes_map: dict[str, str] = {}
     compose_uid = None
 
     # Extract volumes and user from services
@@ -91,33 +98,27 @@ def main():
                     # - "./data:/app/data" (relative path)
                     # - "volume_name:/app/data" (named volume)
                     # - "/absolute/path:/app/data" (absolute path)
-                    
-                    # Split by colon (but be careful with Windows paths and read-only flag)
-                    parts = volume_spec.split(":")
-                    
-                    if len(parts) < 2:
-                        eprint(f"Warning: Invalid volume specification '{volume_spec}', skipping")
-                        continue
-                    
-                    host_path = parts[0]
-                    container_path = parts[1]
-                    # parts[2] would be "ro" or "rw" if present
-                    
+                    # - {type: bind, source: ./data, target: /app/data} (long syntax)
+                    if isinstance(volume_spec, dict):
+                        host_path = str(volume_spec.get("source") or "")
+                        container_path = str(volume_spec.get("target") or "")
+                        if not host_path or not container_path:
+                            eprint(f"Warning: Invalid volume specification '{volume_spec}', skipping")
+                            continue
+                    else:
+                        volume_spec = str(volume_spec)
+                        # Only the first two fields are used; a trailing ":ro"/":rw" is ignored
+                        host_path, sep, rest = volume_spec.partition(":")
+                        if not sep:
+                            eprint(f"Warning: Invalid volume specification '{volume_spec}', skipping")
+                            continue
+                        container_path = rest.partition(":")[0]
+
                     # Skip if it's a named volume reference (no slash in host_path)
                     if host_path and "/" not in host_path and host_path not in ["", "."]:
-                        # Check if it's defined in top-level volumes section
-                        if "volumes" in compose_data and host_path in compose_data["volumes"]:
-                            # Named volume - create path under volumes/<project>/<volume-name>
-                            volume_key = host_path
-                            volume_names.add(volume_key)
-                            container_path_normalized = container_path.lstrip("/")
-                            volumes_list.append(f"{volume_key}={container_path_normalized}")
-                        else:
-                            # Unknown named volume, skip or create default path
-                            volume_key = host_path
-                            volume_names.add(volume_key)
-                            container_path_normalized = container_path.lstrip("/")
-                            volumes_list.append(f"{volume_key}={container_path_normalized}")
+                        # Named volume (declared in top-level volumes or not)
+                        # - create path under volumes/<project>/<volume-name>
+                        volume_key = host_path
                     elif host_path.startswith("./"):
                         # Relative path - convert to volumes/<project>/<name>
                         # ./data -> volumes/<project>/data
@@ -126,31 +127,19 @@ def main():
                             relative_name = "data"
                         # Keep directory structure but use as volume key
                         volume_key = relative_name.replace("/", "_")
-                        container_path_normalized = container_path.lstrip("/")
-                        volumes_list.append(f"{volume_key}={container_path_normalized}")
                     elif host_path.startswith("/"):
                         # Absolute path - use last component as key
                         volume_key = Path(host_path).name or "data"
-                        container_path_normalized = container_path.lstrip("/")
-                        volumes_list.append(f"{volume_key}={container_path_normalized}")
                     else:
                         # Other format, try to use as-is
                         volume_key = host_path.replace("/", "_").replace(".", "_") or "data"
-                        container_path_normalized = container_path.lstrip("/")
-                        volumes_list.append(f"{volume_key}={container_path_normalized}")
-    
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_volumes = []
-    for vol in volumes_list:
-        key = vol.split("=")[0]
-        if key not in seen:
-            seen.add(key)
-            unique_volumes.append(vol)
-    
-    volumes_output = "\n".join(unique_volumes)
-    
-    eprint(f"Extracted {len(unique_volumes)} volume(s) from compose file")
+
+                    # First mapping for a key wins (insertion order is preserved)
+                    volumes_map.setdefault(volume_key, container_path.lstrip("/"))
+
+    volumes_output = "\n".join(f"{key}={path}" for key, path in volumes_map.items())
+
+    eprint(f"Extracted {len(volumes_map)} volume(s) from compose file")
     eprint(f"Project name: {compose_project}")
     
     # Output JSON
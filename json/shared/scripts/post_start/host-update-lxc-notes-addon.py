@@ -19,15 +19,14 @@ and must be at the very beginning of the combined file.
 
 import json
 import os
-import re
 import subprocess
 import sys
 from pathlib import Path
-from urllib.parse import quote, unquote
+from urllib.parse import unquote
 
 # Library functions are prepended - these are available:
 # - parse_lxc_config(conf_text) -> LxcConfig
-# - ADDON_MARKER_RE, etc.
+# - DESCRIPTION_RE, ADDON_MARKER_RE, etc.
 
 
 def get_param(name: str) -> str | None:
@@ -51,7 +50,7 @@ def read_config_file(vm_id: str) -> str:
 
 def extract_description_from_config(conf_text: str) -> str:
     """Extract the description field from config, URL-decoded."""
-    match = re.search(r"^description:\s*(.*)$", conf_text, re.MULTILINE)
+    match = DESCRIPTION_RE.search(conf_text)
     if not match:
         return ""
 
@@ -71,48 +70,40 @@ def insert_addon_marker(description: str, addon_id: str) -> str:
     """Insert addon marker into description if not already present."""
     marker = build_addon_marker(addon_id)
 
-    # Check if marker already exists
-    if f"oci-lxc-deployer:addon {addon_id}" in description:
+    # Check if marker already exists (exact id - "samba" must not match "samba-shares")
+    if any(addon.strip() == addon_id for addon in ADDON_MARKER_RE.findall(description)):
         return description  # Already present
 
+    # One pass: insert before the first ## header (visible section), else
+    # after the last marker comment, else at the start
     lines = description.split("\n")
-    result_lines = []
-    marker_inserted = False
+    insert_at = 0
+    for i, line in enumerate(lines):
+        stripped = line.lstrip()
+        if stripped.startswith("##"):
+            insert_at = i
+            break
+        if stripped.startswith("<!--") and "oci-lxc-deployer:" in line:
+            insert_at = i + 1
 
-    for line in lines:
-        # Insert before first ## header (visible section)
-        if not marker_inserted and line.strip().startswith("##"):
-            result_lines.append(marker)
-            marker_inserted = True
-        result_lines.append(line)
-
-    # If no ## header found, insert before visible content or at end
-    if not marker_inserted:
-        # Find last marker comment and insert after it
-        last_marker_idx = -1
-        for i, line in enumerate(result_lines):
-            if "oci-lxc-deployer:" in line and line.strip().startswith("<!--"):
-                last_marker_idx = i
-
-        if last_marker_idx >= 0:
-            result_lines.insert(last_marker_idx + 1, marker)
-        else:
-            # No markers found, prepend to start
-            result_lines.insert(0, marker)
-
-    return "\n".join(result_lines)
+    lines.insert(insert_at, marker)
+    return "\n".join(lines)
 
 
 def update_container_description(vm_id: str, new_description: str) -> None:
     """Update the container description using pct set."""
+    # The plain text is passed; pct itself encodes it for the config file.
+    # Output is only inspected on failure - keep it as bytes.
+    # close_fds=False skips the per-fd close loop.
     result = subprocess.run(
         ["pct", "set", vm_id, "--description", new_description],
+        stdin=subprocess.DEVNULL,
         capture_output=True,
-        text=True,
+        close_fds=False,
         timeout=30,
     )
     if result.returncode != 0:
-        raise RuntimeError(f"pct set failed: {result.stderr}")
+        raise RuntimeError(f"pct set failed: {result.stderr.decode('utf-8', 'replace')}")
 
 
 def main() -> None:
@@ -134,8 +125,8 @@ def main() -> None:
         # Extract and decode description
         current_desc = extract_description_from_config(conf_text)
 
-        # Check if marker already exists
-        if f"oci-lxc-deployer:addon {addon_id}" in current_desc:
+        # Check if marker already exists (addons parsed from all notes lines)
+        if addon_id in parse_lxc_config(conf_text).addons:
             print(f"Addon marker already exists for {addon_id}, skipping", file=sys.stderr)
             print(json.dumps([{"id": "success", "value": "true"}]))
             return
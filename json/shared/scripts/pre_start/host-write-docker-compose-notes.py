@@ -15,7 +15,6 @@ APP_NAME_RAW = "{{ application_name }}"
 VERSION_RAW = "{{ oci_image_tag }}"
 DEPLOYER_URL_RAW = "{{ deployer_base_url }}"
 VE_CONTEXT_RAW = "{{ ve_context_key }}"
-HOSTNAME_RAW = "{{ hostname }}"
 ICON_BASE64 = "{{ icon_base64 }}"
 ICON_MIME_TYPE = "{{ icon_mime_type }}"
 USERNAME_RAW = "{{ username }}"
@@ -23,43 +22,21 @@ UID_RAW = "{{ uid }}"
 GID_RAW = "{{ gid }}"
 
 
-def build_notes(include_icon):
-    app_id = normalize_value(APP_ID_RAW)
-    app_name = normalize_value(APP_NAME_RAW)
-    version = normalize_value(VERSION_RAW)
-    deployer_url = normalize_value(DEPLOYER_URL_RAW)
-    ve_context = normalize_value(VE_CONTEXT_RAW)
-    icon_base64 = normalize_value(ICON_BASE64)
-    icon_mime_type = normalize_value(ICON_MIME_TYPE)
-    username = normalize_value(USERNAME_RAW)
-    uid = normalize_value(UID_RAW)
-    gid = normalize_value(GID_RAW)
+def main():
+    (app_id, app_name, version, deployer_url, ve_context, icon_base64,
+     icon_mime_type, username, uid, gid) = map(normalize_value, (
+        APP_ID_RAW, APP_NAME_RAW, VERSION_RAW, DEPLOYER_URL_RAW, VE_CONTEXT_RAW,
+        ICON_BASE64, ICON_MIME_TYPE, USERNAME_RAW, UID_RAW, GID_RAW,
+    ))
 
-    lines = build_hidden_markers(
+    # No "LXC template" or "Log file" for docker-compose apps
+    notes, icon = build_notes(
         VMID, app_id=app_id, app_name=app_name, version=version,
         deployer_url=deployer_url, ve_context=ve_context,
         icon_base64=icon_base64, icon_mime_type=icon_mime_type,
-        username=username, uid=uid, gid=gid,
-    )
-
-    lines += build_visible_header(
-        app_id=app_id, app_name=app_name, deployer_url=deployer_url,
-        icon_base64=icon_base64, icon_mime_type=icon_mime_type,
-        include_icon=include_icon,
+        username=username, uid=uid, gid=gid, link_text="Logs",
     )
-
-    lines += build_app_info(app_id=app_id, app_name=app_name, version=version)
-
-    # No "LXC template" or "Log file" for docker-compose apps
-    lines += build_links_section(VMID, deployer_url, ve_context, link_text="Logs")
-
-    return "\n".join(lines)
-
-
-def main():
-    notes_with_icon = build_notes(include_icon=True)
-    notes_without_icon = build_notes(include_icon=False)
-    write_notes(VMID, notes_with_icon, notes_without_icon)
+    write_notes(VMID, notes, icon)
 
 
 if __name__ == "__main__":
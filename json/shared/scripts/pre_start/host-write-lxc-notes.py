@@ -20,61 +20,25 @@ UID_RAW = "{{ uid }}"
 GID_RAW = "{{ gid }}"
 
 
-def build_notes(include_icon):
-    app_id = normalize_value(APP_ID_RAW)
-    app_name = normalize_value(APP_NAME_RAW)
-    version = normalize_value(VERSION_RAW)
-    deployer_url = normalize_value(DEPLOYER_URL_RAW)
-    ve_context = normalize_value(VE_CONTEXT_RAW)
-    hostname = normalize_value(HOSTNAME_RAW)
-    icon_base64 = normalize_value(ICON_BASE64)
-    icon_mime_type = normalize_value(ICON_MIME_TYPE)
-    username = normalize_value(USERNAME_RAW)
-    uid = normalize_value(UID_RAW)
-    gid = normalize_value(GID_RAW)
-    template_path = normalize_value(TEMPLATE_PATH)
-    oci_image_raw = normalize_value(OCI_IMAGE_RAW)
-
-    oci_image_visible = strip_oci_prefix(oci_image_raw)
-
-    lines = build_hidden_markers(
-        VMID, oci_image_visible=oci_image_visible, app_id=app_id,
-        app_name=app_name, version=version, deployer_url=deployer_url,
-        ve_context=ve_context, icon_base64=icon_base64,
-        icon_mime_type=icon_mime_type, username=username, uid=uid, gid=gid,
-    )
-
-    lines += build_visible_header(
-        app_id=app_id, app_name=app_name, deployer_url=deployer_url,
+def main():
+    (app_id, app_name, version, deployer_url, ve_context, hostname,
+     icon_base64, icon_mime_type, username, uid, gid, template_path,
+     oci_image_raw) = map(normalize_value, (
+        APP_ID_RAW, APP_NAME_RAW, VERSION_RAW, DEPLOYER_URL_RAW, VE_CONTEXT_RAW,
+        HOSTNAME_RAW, ICON_BASE64, ICON_MIME_TYPE, USERNAME_RAW, UID_RAW,
+        GID_RAW, TEMPLATE_PATH, OCI_IMAGE_RAW,
+    ))
+
+    notes, icon = build_notes(
+        VMID, app_id=app_id, app_name=app_name, version=version,
+        deployer_url=deployer_url, ve_context=ve_context,
         icon_base64=icon_base64, icon_mime_type=icon_mime_type,
-        include_icon=include_icon,
+        username=username, uid=uid, gid=gid,
+        oci_image_visible=strip_oci_prefix(oci_image_raw),
+        template_path=template_path, hostname=hostname,
+        link_text="Console Logs",
     )
-
-    lines += build_app_info(app_id=app_id, app_name=app_name, version=version)
-
-    # OCI image or LXC template
-    if oci_image_visible:
-        lines.append("")
-        lines.append("OCI image: %s" % oci_image_visible)
-    elif template_path:
-        lines.append("")
-        lines.append("LXC template: %s" % template_path)
-
-    # Log file location
-    if hostname:
-        log_file = "/var/log/lxc/%s-%s.log" % (hostname, VMID)
-        lines.append("")
-        lines.append("Log file: %s" % log_file)
-
-    lines += build_links_section(VMID, deployer_url, ve_context, link_text="Console Logs")
-
-    return "\n".join(lines)
-
-
-def main():
-    notes_with_icon = build_notes(include_icon=True)
-    notes_without_icon = build_notes(include_icon=False)
-    write_notes(VMID, notes_with_icon, notes_without_icon)
+    write_notes(VMID, notes, icon)
 
 
 if __name__ == "__main__":